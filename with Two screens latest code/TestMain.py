@@ -3,208 +3,112 @@ import tkinter as tk
 from PIL import Image, ImageTk
 import threading
 import time
-import RPi.GPIO as GPIO  # Import the GPIO library for button handling
-import os  # For saving files to SD card
 
 # Custom Modules
 import rtc_handler_manual as rtc_handler  # Import the manual RTC handler
 import uart_handler  # Import the UART handler
-# Load OpenCV's Haar Cascade for face detection
-face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-
-# Global variables to hold the frames and weight
-frame1 = None
-frame2 = None
-weight = "Non"  # Initial weight value
-lock = threading.Lock()  # To synchronize frame updates
-capture_lock = threading.Lock()  # Lock for capture process
-is_capturing = True  # Control flag for camera capture threads
-pause_event = threading.Event()  # Event to pause and resume operations
+import camera_handler  # Camera opening and backoff-based reconnection
+import frame_pipeline  # Face analysis and record image building
+import display_refresh  # Adaptive refresh rate for the monitoring screen
+import view_model  # Panel texts, and widget updates only when they change
+import stage_timing  # Hot-path timing histograms
+import metrics_server  # Prometheus metrics endpoint for fleet monitoring
+import kiosk_core  # Cameras, scale, RTC, button and saving, shared with headless_main.py
+import app_config  # Device configuration file
+from kiosk_core import face_capture, plate_capture, pause_event
+
+# Monitoring screen refresh, set up from the display settings in main()
+refresh_schedule = display_refresh.AdaptiveRefresh()
+displayed_frames = frame_pipeline.PanelFrames()  # Frame (or camera state) shown in each camera panel
+screen_view = view_model.WidgetView()  # What each monitoring screen widget currently shows
+
+# Monitoring screen layout and display options, set from the display settings in main()
+layout = view_model.get_layout("two_screen")
+display_settings = dict(app_config.DEFAULT_CONFIG["display"])
+panels = {}  # Panel name -> Tk label, created by setup_gui() from the layout
+
+# Timing stats panel, toggled with the hidden F9 key
+show_stats = False
+STATS_REFRESH_INTERVAL = 1.0  # Seconds between panel updates
+stats_updated_time = 0
 
 # Global screen dimensions
 screen_width = 0
 screen_height = 0
 
-# Variables to hold the video capture objects
-cap1 = None
-cap2 = None
-
-# GPIO Setup
-BUTTON_PIN = 17  # GPIO pin number for the button
-GPIO.setmode(GPIO.BCM)
-GPIO.setup(BUTTON_PIN, GPIO.IN, pull_up_down=GPIO.PUD_UP)  # Use pull-up resistor
-
-# Debounce and press duration constants
-PRESS_DURATION_THRESHOLD = 0.15  # 150 ms in seconds
-pic_number = 1  # Initialize globally for unique image naming
-button_pressed_time = 0
-
-# Function to reconnect camera
-def reconnect_camera(camera_index):
-    cap = None
-    while cap is None or not cap.isOpened():
-        try:
-            cap = cv2.VideoCapture(camera_index)
-            cap.set(cv2.CAP_PROP_FRAME_WIDTH, 320)  # Reduce resolution for performance
-            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 240)
-            if cap.isOpened():
-                print(f"Camera {camera_index} reconnected successfully.")
-                return cap  # Return the successfully opened camera
-        except Exception as e:
-            print(f"Error reconnecting to camera {camera_index}: {e}")
-            time.sleep(1)  # Retry after 1 second
-    return None
-
-# Function to capture frames from the USB webcam in a separate thread
-def capture_webcam():
-    global frame1, cap1, is_capturing
-    while is_capturing:
-        pause_event.wait()  # Wait here if operations are paused
-        if cap1 is None or not cap1.isOpened():
-            cap1 = reconnect_camera(0)  # Camera index 0 for USB webcam
-        if cap1 and cap1.isOpened():
-            ret1, frame1_temp = cap1.read()
-            if ret1:
-                with lock:
-                    frame1 = frame1_temp
-            else:
-                cap1.release()
-                cap1 = None  # Force reconnection if capturing fails
-
-# Function to capture frames from the second USB camera in a separate thread
-def capture_laptop_cam():
-    global frame2, cap2, is_capturing
-    while is_capturing:
-        pause_event.wait()  # Wait here if operations are paused
-        if cap2 is None or not cap2.isOpened():
-            cap2 = reconnect_camera(2)  # Camera index 2 for the second USB camera
-        if cap2 and cap2.isOpened():
-            ret2, frame2_temp = cap2.read()
-            if ret2:
-                with lock:
-                    frame2 = frame2_temp
-            else:
-                cap2.release()
-                cap2 = None  # Force reconnection if capturing fails
-
-# Function to update the display of both cameras and text
+# Function to update the display of both cameras and text.
+# Camera panels are only redrawn when their camera has delivered a new frame,
+# and the next tick is scheduled from the measured cost of this one.
 def update_display():
-    global frame1, frame2, weight
-    if not pause_event.is_set():  # Don't update if operations are paused
-        return
-    with lock:
-        # Display Weight in the meal_label frame
+    global stats_updated_time
+    tick_start = time.monotonic()
+    if pause_event.is_set():  # Don't update if operations are paused, but keep the loop going
+        frame1, seq1 = face_capture.get_frame_with_seq(scale=face_capture.display_scale)
+        frame2, seq2 = plate_capture.get_frame_with_seq(scale=plate_capture.display_scale)
+        stage_timing.record("display.frames", time.monotonic() - tick_start)
+
+        # Display the time, date and weight in the layout's text panels
         weight = uart_handler.weight  # Fetch the weight from uart_handler
-        meal_label.config(text=f"\tMidday Meal\n\nTime: {rtc_handler.get_rtc_time()['time']}\n\nDate: {rtc_handler.get_rtc_time()['date']}\n\nFood Weight: {weight}")
-
-        # Display and analyze Laptop Camera feed
-        if frame1 is not None:
-            frame1_resized = cv2.resize(frame1, (screen_width // 2 - 20, screen_height // 2 - 20))
-            gray_frame = cv2.cvtColor(frame1_resized, cv2.COLOR_BGR2GRAY)  # Convert to grayscale for detection
-            faces = face_cascade.detectMultiScale(gray_frame, scaleFactor=1.1, minNeighbors=5, minSize=(100, 100))
-            
-            if len(faces) > 0:
-                # Assume the first detected face is the target
-                (x, y, w, h) = faces[0]
-                
-                # Check lighting conditions (average brightness of the face region)
-                face_region = gray_frame[y:y+h, x:x+w]
-                avg_brightness = cv2.mean(face_region)[0]
-
-                # Basic face quality checks
-                if w < 100 or h < 100:
-                    feedback_text = "Face is too small. Move closer."
-                elif avg_brightness < 50:
-                    feedback_text = "Lighting is too low."
+        rtc_time = rtc_handler.get_rtc_time()  # Served from the monotonic clock, no I2C read per tick
+        for name, format_text in layout["texts"].items():
+            if not (show_stats and name == layout["stats_panel"]):
+                screen_view.apply(panels[name], text=format_text(rtc_time, weight))  # Only relaid out when the text changes
+
+        panel_size = (screen_width // 2 - 20, screen_height // 2 - 20)
+
+        # Display and analyze the face camera feed
+        if not panel_is_current("face", frame1, seq1):
+            if frame1 is not None:
+                if display_settings["face_feedback"]:
+                    with stage_timing.timed("display.analyze"):
+                        frame1 = frame_pipeline.annotate_face_frame(frame1, panel_size, kiosk_core.face_cascade)
+                    display_size = None  # Already resized by the annotation
                 else:
-                    feedback_text = "Face detected. Ready to capture."
-                
-                # Draw a rectangle around the face
-                cv2.rectangle(frame1_resized, (x, y), (x+w, y+h), (0, 255, 0), 2)
-                # Display feedback
-                cv2.putText(frame1_resized, feedback_text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+                    display_size = panel_size
+                with stage_timing.timed("display.render"):
+                    imgtk1 = ImageTk.PhotoImage(image=frame_pipeline.to_display_image(frame1, display_size))
+                panels["face"].imgtk1 = imgtk1
+                screen_view.apply(panels["face"], image=imgtk1)
+            else:
+                screen_view.apply(panels["face"], image="", text=view_model.format_camera_unavailable(1, camera_handler.get_camera_state('face')))  # Show a message if the camera is not available
+
+        # Display the plate camera feed
+        if not panel_is_current("plate", frame2, seq2):
+            if frame2 is not None:
+                with stage_timing.timed("display.render"):
+                    imgtk2 = ImageTk.PhotoImage(image=frame_pipeline.to_display_image(frame2, panel_size))
+                panels["plate"].imgtk2 = imgtk2
+                screen_view.apply(panels["plate"], image=imgtk2)
             else:
-                # No face detected feedback
-                feedback_text = "No face detected. Adjust position or lighting."
-                cv2.putText(frame1_resized, feedback_text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-
-            img1 = cv2.cvtColor(frame1_resized, cv2.COLOR_BGR2RGB)
-            img1 = Image.fromarray(img1)
-            imgtk1 = ImageTk.PhotoImage(image=img1)
-            laptop_label.imgtk1 = imgtk1
-            laptop_label.config(image=imgtk1)
-        else:
-            laptop_label.config(text="Camera 1 not available")  # Show a message if the camera is not available
-
-        # Display USB Webcam in the bottom-left box
-        if frame2 is not None:
-            frame2_resized = cv2.resize(frame2, (screen_width // 2 - 20, screen_height // 2 - 20))
-            img2 = cv2.cvtColor(frame2_resized, cv2.COLOR_BGR2RGB)
-            img2 = Image.fromarray(img2)
-            imgtk2 = ImageTk.PhotoImage(image=img2)
-            webcam_label.imgtk2 = imgtk2
-            webcam_label.config(image=imgtk2)
-        else:
-            webcam_label.config(text="Camera 2 not available")  # Show a message if the camera is not available
-
-    # Schedule the next frame update
-    root.after(50, update_display)  # Update every 50 ms for smoother display
+                screen_view.apply(panels["plate"], image="", text=view_model.format_camera_unavailable(2, camera_handler.get_camera_state('plate')))  # Show a message if the camera is not available
+
+        if show_stats and tick_start - stats_updated_time >= STATS_REFRESH_INTERVAL:
+            stats_updated_time = tick_start
+            screen_view.apply(panels[layout["stats_panel"]], text=stage_timing.format_stats())
+    tick_cost = time.monotonic() - tick_start
+    stage_timing.record("display.tick", tick_cost)
+
+    # Schedule the next frame update; slow ticks lower the rate instead of starving the Tk event loop
+    root.after(refresh_schedule.next_delay_ms(tick_cost), update_display)
+
+# Function to check whether a camera panel already shows this frame, and remember it if not.
+# A lost camera's message is shown once, and again when its state changes.
+def panel_is_current(role, frame, seq):
+    camera_state = camera_handler.get_camera_state(role) if frame is None else None
+    return displayed_frames.is_current(role, frame, seq, camera_state)
+
+# Function to show a pop-up while an image is being saved; returns the function that closes it
+def show_saving_popup():
+    popup = tk.Toplevel(root)
+    popup.title("Saving Image")
+    popup.geometry("300x100+{}+{}".format(screen_width//2 - 150, screen_height//2 - 50))  # Center the pop-up
+    tk.Label(popup, text="Wait For Image Saving...", font=("Helvetica", 14)).pack(pady=20)
+    popup.update()
+    return popup.destroy
 
 # Function to capture images from both cameras and save to SD card
 def capture_and_save_image():
-    global frame1, frame2, weight, pic_number
-    # Pause operations
-    pause_event.clear()
-
-    with capture_lock:
-
-        # Show pop-up indicating saving process
-        popup = tk.Toplevel(root)
-        popup.title("Saving Image")
-        popup.geometry("300x100+{}+{}".format(screen_width//2 - 150, screen_height//2 - 50))  # Center the pop-up
-        tk.Label(popup, text="Wait For Image Saving...", font=("Helvetica", 14)).pack(pady=20)
-        popup.update()
-
-        # Capture the frames
-        timestamp = time.strftime("%Y%m%d_%H%M%S")
-        device_id = "DeviceID"  # Replace with actual Device ID
-        filename = f"{device_id}_{timestamp}_{pic_number}.jpg"
-
-        # Combine frames into one image
-        if frame1 is not None and frame2 is not None:
-            combined_image = cv2.vconcat([frame1, frame2])
-            cv2.putText(combined_image, f"{timestamp} Weight: {weight}, {device_id}, {pic_number}",
-                        (10, combined_image.shape[0] - 10),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-
-            # Ensure the save path exists
-            save_path = "/home/middaymealtest/my_project/data""
-            if not os.path.exists(save_path):
-                os.makedirs(save_path)
-
-            # Save the combined image
-            full_path = os.path.join(save_path, filename)
-            cv2.imwrite(full_path, combined_image)
-            print(f"Image saved at {full_path}")
-
-            # Increment picture number
-            pic_number += 1
-
-        # Destroy pop-up and resume operations
-        popup.destroy()
-    # Resume operations
-    pause_event.set()
-
-# Button polling function
-def poll_button():
-    global button_pressed_time
-    while True:
-        if GPIO.input(BUTTON_PIN) == GPIO.LOW:  # Button is pressed
-            current_time = time.time()
-            if current_time - button_pressed_time > PRESS_DURATION_THRESHOLD:
-                button_pressed_time = current_time
-                capture_and_save_image()
-        time.sleep(0.1)  # Small delay to avoid rapid polling
+    kiosk_core.capture_and_save_image(show_saving_popup)
 
 # Function to minimize the window when the Escape key is pressed
 def minimize_window(event=None):
@@ -212,16 +116,29 @@ def minimize_window(event=None):
     root.overrideredirect(False)
     root.iconify()  # Minimize the window
 
-# Function to set up the GUI window for the Init Screen
-def setup_init_screen():
-    global root, init_status_label, screen_width, screen_height
+# Function to show or hide the timing stats in the layout's stats panel (hidden F9 key)
+def toggle_stats(event=None):
+    global show_stats, stats_updated_time
+    show_stats = not show_stats
+    stats_updated_time = 0
+    stats_label = panels[layout["stats_panel"]]
+    if not show_stats:
+        # Back to the panel's own text and font; a clock or weight panel is refilled on the next tick
+        label_options = next(options for name, _, options in layout["panels"] if name == layout["stats_panel"])
+        screen_view.apply(stats_label, text=label_options.get("text", ""), font=label_options["font"])
+    else:
+        screen_view.apply(stats_label, text=stage_timing.format_stats(), font=("Courier", 10))
+
+# Function to create the full-screen Tkinter window
+def setup_root(title):
+    global root, screen_width, screen_height
 
-    # Initialize the Tkinter window for the init screen
     root = tk.Tk()
-    root.title("Initialization")
+    root.title(title)
 
-    # Bind the Escape key to minimize the window
-    root.bind("<Escape>", minimize_window)
+    # Bind the Escape key to minimize the window, unless the kiosk must stay full screen
+    if display_settings["allow_escape"]:
+        root.bind("<Escape>", minimize_window)
 
     # Get the screen width and height
     screen_width = root.winfo_screenwidth()
@@ -231,6 +148,13 @@ def setup_init_screen():
     root.geometry(f"{screen_width}x{screen_height}+0+0")
     root.attributes("-fullscreen", True)
 
+# Function to set up the GUI window for the Init Screen
+def setup_init_screen():
+    global init_status_label
+
+    # Initialize the Tkinter window for the init screen
+    setup_root("Initialization")
+
     # Load and display the logo
     try:
         logo = Image.open("middaymeallog.png")  # Use the file name directly if it's in the same folder
@@ -251,155 +175,121 @@ def update_init_screen(status_message):
     init_status_label.config(text=status_message)
     root.update_idletasks()
 
+# Function to get the device checks to run; the face detector only matters
+# for the face feedback, and units without a button skip its check
+def init_probes():
+    return [probe for probe in kiosk_core.INIT_PROBES
+            if (display_settings["face_feedback"] or probe[0] != "Face detector")
+            and (kiosk_core.BUTTON_ENABLED or probe[0] != "Button")]
+
 # Function to perform initialization
+# Status lines appear as each device check finishes (a retried check updates
+# its own line), and the monitoring screen opens as soon as every required
+# check has passed.
 def init_screen():
     # Display Welcome Message with Logo
-    update_init_screen("Welcome to the Mid Day Meal Scheme!")
-    time.sleep(2)  # Display welcome message for 3 seconds
-
-    # Initialize and check modules one by one
-    init_status = "Setting up modules...\n"
-    all_success = True
-
-    # Check RTC
-    try:
-        rtc_handler.get_rtc_time()
-        init_status += "RTC: OK\n"
-        update_init_screen(init_status)
-    except Exception as e:
-        init_status += f"RTC Error: {str(e)}\n"
-        update_init_screen(init_status)
-        all_success = False
-
-    # Check UART
-    try:
-        uart_handler.setup_uart()
-        init_status += "UART: OK\n"
-        update_init_screen(init_status)
-    except Exception as e:
-        init_status += f"UART Error: {str(e)}\n"
-        update_init_screen(init_status)
-        all_success = False
-
-    # Check Cameras
-    global cap1, cap2
-    cap1 = reconnect_camera(0)
-    if cap1 and cap1.isOpened():
-        init_status += "Camera 1: OK\n"
-    else:
-        init_status += "Camera 1: Error\n"
-        all_success = False
+    welcome = "Welcome to the Mid Day Meal Scheme!\n\nSetting up modules...\n"
+    init_status = welcome
     update_init_screen(init_status)
+    status_lines = {}  # Latest status line of each check, in the order they first reported
 
-    cap2 = reconnect_camera(2)
-    if cap2 and cap2.isOpened():
-        init_status += "Camera 2: OK\n"
-    else:
-        init_status += "Camera 2: Error\n"
-        all_success = False
-    update_init_screen(init_status)
+    def on_result(name, result, error):
+        nonlocal init_status
+        status_lines[name] = kiosk_core.format_probe_result(name, result, error)
+        init_status = welcome + "".join(line + "\n" for line in status_lines.values())
+        update_init_screen(init_status)
 
-    # Display the final status for 5 seconds before moving on
-    time.sleep(2)
+    probes = init_probes()
+    results = kiosk_core.run_init_probes(on_result, probes)  # Also hands the opened cameras to the capture loops
+    all_success = kiosk_core.required_probes_ok(results, probes)
 
     # If all modules are OK, proceed to the monitoring screen
     if all_success:
         setup_gui()  # Switch to the Monitoring Screen
-        start_camera_threads()
+        kiosk_core.start_camera_threads(capture_and_save_image, use_button=kiosk_core.BUTTON_ENABLED)
         update_display()  # Start displaying the monitoring screen
     else:
         # If any error, keep displaying the Init Screen for user awareness
         init_status += "\nInitialization failed. Please check the setup."
         update_init_screen(init_status)
 
-# Function to set up the GUI window for Monitoring Screen
-def setup_gui():
-    global screen_width, screen_height, weight_label, webcam_label, meal_label, laptop_label, notes_label
+# Function to perform initialization without the init screen: the monitoring
+# screen is already up, and the device checks are printed to the console
+def init_in_background():
+    print("Welcome to the Mid Day Meal Scheme!\nSetting up modules...")
+    probes = init_probes()
+    results = kiosk_core.run_init_probes(lambda *result: print(kiosk_core.format_probe_result(*result)), probes)
+    if kiosk_core.required_probes_ok(results, probes):
+        kiosk_core.start_camera_threads(capture_and_save_image, use_button=kiosk_core.BUTTON_ENABLED)
+    else:
+        print("Initialization failed. Please check the setup.")
+        root.after(0, screen_view.apply, panels[layout["stats_panel"]], text="Initialization failed.\nPlease check the setup.")
 
+# Function to set up the GUI window for Monitoring Screen, with the panels of the layout
+def setup_gui():
     # Clear the Init Screen
     for widget in root.winfo_children():
         widget.destroy()
+    screen_view.forget()
 
-    # Set the window to full screen
-    root.geometry(f"{screen_width}x{screen_height}+0+0")
-    root.attributes("-fullscreen", True)
+    root.title("Midday Meal")
+
+    # Hidden keys for field diagnostics: F9 shows timing stats, F10 dumps them to a file,
+    # F11 starts (or stops) a profile of all threads
+    root.bind("<F9>", toggle_stats)
+    root.bind("<F10>", kiosk_core.dump_stats)
+    root.bind("<F11>", kiosk_core.toggle_profiler)
+
+    # One label per panel: camera panels show frames, the others text
+    panels.clear()
+    for name, position, label_options in layout["panels"]:
+        panels[name] = tk.Label(root, **label_options)
+        panels[name].grid(**position, sticky="nsew", padx=10, pady=10)
 
-    # Bind the Escape key to minimize the window
-    root.bind("<Escape>", minimize_window)
-
-    # Frame for the Laptop Camera (Top Left Box) - More Height and Width
-    laptop_label = tk.Label(root, bd=5, relief="raised")
-    laptop_label.grid(row=0, column=0, rowspan=3, sticky="nsew", padx=10, pady=10)
-
-    # Frame for the USB Webcam (Bottom Left Box)
-    webcam_label = tk.Label(root, bd=5, relief="raised")
-    webcam_label.grid(row=3, column=0, rowspan=2, sticky="nsew", padx=10, pady=10)
-
-    # Frame for Date, Time, and Food Weight (Right Side) - More Height
-    meal_label = tk.Label(root, font=("Helvetica", 20), bg="white", fg="black", bd=5, relief="ridge", padx=10, pady=10, anchor="w", justify="left")
-    meal_label.grid(row=0, column=1, rowspan=3, sticky="nsew", padx=10, pady=10)
-
-    # Frame for Notes (Right Side Below Date, Time, and Food Weight)
-    notes_label = tk.Label(root, font=("Helvetica", 18), bg="white", fg="black", bd=5, relief="groove", padx=10, pady=10, anchor="w", justify="left", text="Notes Frame")
-    notes_label.grid(row=3, column=1, rowspan=2, sticky="nsew", padx=10, pady=10)
-
-    # Adjust the weights to give more space to specific rows and columns
-    # Rows for Laptop and Meal should have more height
-    root.grid_rowconfigure(0, weight=3)  # More height for the Laptop frame
-    root.grid_rowconfigure(1, weight=3)  # More height for continuation if needed
-    root.grid_rowconfigure(2, weight=3)  # More height for Meal frame
-    root.grid_rowconfigure(3, weight=2)  # Less height for the Web Camera
-    root.grid_rowconfigure(4, weight=1)  # Less height for Notes
-
-    # Columns for Laptop and Web should have more width
-    root.grid_columnconfigure(0, weight=3)  # More width for the Laptop and Web Camera frames
-    root.grid_columnconfigure(1, weight=2)  # Less width for Date/Time and Notes
-
-# Function to start camera threads
-def start_camera_threads():
-    # Start threads to capture frames from both cameras
-    threading.Thread(target=capture_webcam, daemon=True).start()
-    threading.Thread(target=capture_laptop_cam, daemon=True).start()
-
-    # Start thread to read weight from UART
-    threading.Thread(target=uart_handler.read_weight_from_uart, daemon=True).start()
-
-    # Start the button polling in a separate thread
-    threading.Thread(target=poll_button, daemon=True).start()
-
-# Function to initialize video capture for cameras
-def setup_video_capture():
-    global cap1, cap2
-    cap1 = reconnect_camera(0)  # Start USB webcam (camera index 0)
-    cap2 = reconnect_camera(2)  # Start second USB camera (camera index 2)
-
-# Function to periodically attempt RTC sync with NTP server
-def periodic_rtc_sync_with_ntp():
-    while True:
-        rtc_handler.sync_rtc_with_ntp()
-        time.sleep(65)  # Retry every 10 minutes
+    # Give the rows and columns their share of the screen
+    for row, row_weight in enumerate(layout["row_weights"]):
+        root.grid_rowconfigure(row, weight=row_weight)
+    for column, column_weight in enumerate(layout["column_weights"]):
+        root.grid_columnconfigure(column, weight=column_weight)
 
 # Main function to run the application
 def main():
-    global root
+    global refresh_schedule, layout, display_settings
 
-    # Setup the Init Screen GUI
-    setup_init_screen()
-
-    # Perform the initialization in a separate thread
-    threading.Thread(target=init_screen, daemon=True).start()
-    threading.Thread(target=periodic_rtc_sync_with_ntp, daemon=True).start()
+    # Load the device configuration before anything touches the hardware
+    try:
+        settings = app_config.load_and_apply()
+    except app_config.ConfigError as e:
+        print(f"Configuration error: {e}")
+        return
+    display_settings = settings["display"]
+    layout = view_model.get_layout(display_settings["layout"])
+    # Target refresh rate, and the lowest it may drop to when ticks are slow
+    refresh_schedule = display_refresh.AdaptiveRefresh(settings["display"]["fps"], settings["display"]["min_fps"])
+
+    # Load the face detector (only needed for the face feedback) and start the NTP
+    # sync, metrics and diagnostics while the devices are checked
+    kiosk_core.start_services(load_detector=display_settings["face_feedback"])
+    metrics_server.register_gauge("display_fps", "Refresh rate of the monitoring screen", lambda: round(refresh_schedule.fps, 2))
+
+    if display_settings["init_screen"]:
+        # Setup the Init Screen GUI
+        setup_init_screen()
+
+        # Perform the initialization in a separate thread
+        threading.Thread(target=init_screen, daemon=True).start()
+    else:
+        # Straight to the monitoring screen; cameras show as unavailable until they are open
+        setup_root("Midday Meal")
+        setup_gui()
+        threading.Thread(target=init_in_background, daemon=True).start()
+        update_display()
 
     # Run the Tkinter main loop
     root.mainloop()
 
-    # Release the video captures when the window is closed
-    if cap1:
-        cap1.release()
-    if cap2:
-        cap2.release()
-
-    GPIO.cleanup()  # Clean up GPIO settings
+    # Release the video captures and GPIO when the window is closed
+    kiosk_core.shutdown()
 
     cv2.destroyAllWindows()
 
@@ -0,0 +1,303 @@
+#app_config.py
+# Device configuration, loaded once at startup from a TOML or JSON file and
+# checked against DEFAULT_CONFIG: every key must exist there and have the same
+# type, so a typo or a wrong value stops the app at startup instead of
+# surfacing later on the device.
+#
+# The file holds the settings shared by the whole fleet plus optional
+# overrides, applied in this order:
+#   [variants.<name>]  - per hardware variant, picked by device.variant
+#   [devices.<name>]   - per device, picked by the MIDDAYMEAL_DEVICE environment
+#                        variable or the host name
+# The file is MIDDAYMEAL_CONFIG if set, else the first of CONFIG_SEARCH_PATHS
+# that exists. See config.example.toml.
+import copy
+import inspect
+import json
+import os
+import socket
+
+# Every setting and its default (the values the code used before it was configurable)
+DEFAULT_CONFIG = {
+    "device": {
+        "id": "DeviceID",  # Written into image names and captions
+        "variant": "",  # Hardware variant whose overrides apply
+    },
+    "storage": {
+        "save_path": "/home/middaymealtest/my_project/data",
+        "stats_path": "/home/middaymealtest/my_project/stats",
+    },
+    # Camera roles; device is anything camera_handler.CAMERA_ROLES accepts
+    "cameras": {
+        "face": {"device": 0, "fourcc": "MJPG", "width": 320, "height": 240, "fps": 15, "buffer_size": 1,
+                 "exposure": None, "raw_mjpeg": False, "display_scale": 1},
+        "plate": {"device": 2, "fourcc": "MJPG", "width": 320, "height": 240, "fps": 15, "buffer_size": 1,
+                  "exposure": None, "raw_mjpeg": False, "display_scale": 1},
+    },
+    "uart": {
+        "port": "/dev/ttyS0",
+        "baudrate": 9600,
+        "timeout": 2.0,
+        "driver": "ascii_stream",
+        "driver_options": {},
+        "replay_file": None,  # Play back a recorded trace instead of opening the port
+    },
+    "rtc": {
+        "backend": "pcf8523",
+        "address": 0x68,
+        "bus": 1,
+    },
+    "button": {
+        "enabled": True,  # False on units built without the capture button
+        "pin": 17,
+        "press_duration": 0.15,  # Seconds
+    },
+    "display": {
+        "layout": "two_screen",  # See view_model.LAYOUT_PROFILES
+        "init_screen": True,  # Show device checks on screen before the monitoring screen
+        "face_feedback": True,  # Face box and positioning hints on the face camera
+        "allow_escape": True,  # Escape minimizes the full-screen window
+        "fps": 20,
+        "min_fps": 2,
+    },
+    "ntp": {
+        "servers": ["0.pool.ntp.org", "1.pool.ntp.org", "2.pool.ntp.org", "time.google.com"],
+    },
+    "metrics": {
+        "enabled": True,
+        "host": "127.0.0.1",
+        "port": 9101,
+    },
+}
+
+# Types of settings whose default does not tell (None defaults, several allowed types)
+FIELD_TYPES = {
+    "cameras.*.device": (int, str),
+    "cameras.*.exposure": (int, float, type(None)),
+    "cameras.*.fps": (int, float),
+    "display.fps": (int, float),
+    "display.min_fps": (int, float),
+    "uart.replay_file": (str, type(None)),
+}
+
+CONFIG_SEARCH_PATHS = [
+    "/etc/middaymeal/config.toml",
+    "/etc/middaymeal/config.json",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.toml"),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json"),
+]
+
+# The loaded configuration, set by load_config()
+config = None
+
+class ConfigError(ValueError):
+    pass
+
+# Function to read a TOML or JSON file into a dict
+def read_config_file(path):
+    if path.endswith(".toml"):
+        try:
+            import tomllib  # Python 3.11+
+        except ImportError:
+            import tomli as tomllib  # Older Pythons: pip install tomli
+        with open(path, "rb") as config_file:
+            return tomllib.load(config_file)
+    with open(path) as config_file:
+        return json.load(config_file)
+
+# Function to merge override into base (nested dicts are merged, other values replaced)
+def merge(base, override):
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+# Function to get the allowed types of a setting from FIELD_TYPES or its default
+def allowed_types(path, default):
+    parts = path.split(".")
+    for pattern, types in FIELD_TYPES.items():
+        pattern_parts = pattern.split(".")
+        if len(pattern_parts) == len(parts) and all(p in ("*", part) for p, part in zip(pattern_parts, parts)):
+            return types
+    if isinstance(default, bool):
+        return (bool,)
+    if isinstance(default, float):
+        return (int, float)
+    return (type(default),)
+
+# Function to check that a setting has one of the allowed types; raises ConfigError
+def check_type(key_path, value, types):
+    if not isinstance(value, types) or (isinstance(value, bool) and bool not in types):
+        names = " or ".join("null" if t is type(None) else t.__name__ for t in types)
+        raise ConfigError(f"Setting '{key_path}' must be {names}, not {value!r}")
+
+# Function to check a config section against its defaults; raises ConfigError
+def check_section(values, defaults, path):
+    for key, value in values.items():
+        key_path = f"{path}.{key}" if path else key
+        if path == "cameras":
+            default = defaults.get(key, defaults["face"])  # Extra roles look like the built-in ones
+        elif key not in defaults:
+            raise ConfigError(f"Unknown setting '{key_path}'")
+        else:
+            default = defaults[key]
+        if isinstance(default, dict) and key_path != "uart.driver_options":
+            if not isinstance(value, dict):
+                raise ConfigError(f"Setting '{key_path}' must be a table of settings")
+            check_section(value, default, key_path)
+            continue
+        check_type(key_path, value, allowed_types(key_path, default))
+
+# Function to check values that are the right type but out of range; raises ConfigError
+def check_values(settings):
+    import camera_handler
+    import clock_backends
+    import scale_drivers
+    import view_model
+    for role, camera in settings["cameras"].items():
+        for key in ("width", "height", "fps", "buffer_size"):
+            if camera[key] <= 0:
+                raise ConfigError(f"Setting 'cameras.{role}.{key}' must be positive")
+        if camera["display_scale"] not in camera_handler.JPEG_SCALE_FLAGS:
+            raise ConfigError(f"Setting 'cameras.{role}.display_scale' must be one of "
+                              f"{', '.join(map(str, camera_handler.JPEG_SCALE_FLAGS))}")
+    if settings["uart"]["driver"] not in scale_drivers.SCALE_DRIVERS:
+        raise ConfigError(f"Unknown scale driver '{settings['uart']['driver']}'. "
+                          f"Available: {', '.join(scale_drivers.SCALE_DRIVERS)}")
+    convert_driver_options(settings["uart"]["driver"], settings["uart"]["driver_options"])
+    if settings["rtc"]["backend"] not in clock_backends.CLOCK_BACKENDS:
+        raise ConfigError(f"Unknown clock backend '{settings['rtc']['backend']}'. "
+                          f"Available: {', '.join(clock_backends.CLOCK_BACKENDS)}")
+    if settings["display"]["layout"] not in view_model.LAYOUT_PROFILES:
+        raise ConfigError(f"Unknown layout '{settings['display']['layout']}'. "
+                          f"Available: {', '.join(view_model.LAYOUT_PROFILES)}")
+    if not 0 < settings["display"]["min_fps"] <= settings["display"]["fps"]:
+        raise ConfigError("Setting 'display.min_fps' must be positive and no more than 'display.fps'")
+    if not settings["ntp"]["servers"]:
+        raise ConfigError("Setting 'ntp.servers' must list at least one server")
+    if not all(isinstance(server, str) and server for server in settings["ntp"]["servers"]):
+        raise ConfigError("Setting 'ntp.servers' must be a list of host names")
+    if not 0 <= settings["metrics"]["port"] <= 65535:
+        raise ConfigError("Setting 'metrics.port' must be a port number")
+
+# Function to check uart.driver_options against the parameters of the scale
+# driver's constructor and return them ready to pass to it; raises ConfigError.
+# Byte-string options (e.g. request_response's command) are written as strings.
+def convert_driver_options(driver_name, options):
+    import scale_drivers
+    parameters = inspect.signature(scale_drivers.SCALE_DRIVERS[driver_name]).parameters
+    converted = {}
+    for key, value in options.items():
+        if key not in parameters:
+            raise ConfigError(f"Unknown setting 'uart.driver_options.{key}' for scale driver '{driver_name}'. "
+                              f"Available: {', '.join(parameters) or 'none'}")
+        default = parameters[key].default
+        if isinstance(default, bytes):
+            check_type(f"uart.driver_options.{key}", value, (str,))
+            value = value.encode("latin-1")
+        else:
+            check_type(f"uart.driver_options.{key}", value, allowed_types(f"uart.driver_options.{key}", default))
+        converted[key] = value
+    return converted
+
+# Function to find the config file to load, or None to run on the defaults
+def find_config_file():
+    path = os.environ.get("MIDDAYMEAL_CONFIG")
+    if path:
+        return path
+    for path in CONFIG_SEARCH_PATHS:
+        if os.path.exists(path):
+            return path
+    return None
+
+# Function to load, merge and check the configuration; raises ConfigError.
+# path defaults to find_config_file(), device to $MIDDAYMEAL_DEVICE or the host name.
+def load_config(path=None, device=None):
+    global config
+    path = path or find_config_file()
+    file_values = {}
+    if path:
+        try:
+            file_values = read_config_file(path)
+        except (OSError, ValueError) as e:
+            raise ConfigError(f"Could not read config file {path}: {e}")
+    device = device or os.environ.get("MIDDAYMEAL_DEVICE") or socket.gethostname()
+
+    variants = file_values.pop("variants", {})
+    devices = file_values.pop("devices", {})
+    for name, overrides in list(variants.items()) + list(devices.items()):
+        check_section(overrides, DEFAULT_CONFIG, "")
+    check_section(file_values, DEFAULT_CONFIG, "")
+
+    device_overrides = devices.get(device, {})
+    # The variant can be set fleet-wide or by the device's own overrides
+    variant = merge(file_values, device_overrides).get("device", {}).get("variant", "")
+    if variant and variant not in variants:
+        raise ConfigError(f"Unknown variant '{variant}'. Available: {', '.join(variants) or 'none'}")
+
+    settings = merge(DEFAULT_CONFIG, file_values)
+    settings = merge(settings, variants.get(variant, {}))
+    settings = merge(settings, device_overrides)
+    check_values(settings)
+
+    overrides = [f"variant {variant}"] if variant else []
+    if device_overrides:
+        overrides.append(f"device {device}")
+    print(f"Config: {path or 'defaults'}" + (f" ({', '.join(overrides)})" if overrides else ""))
+    config = settings
+    return settings
+
+# Function to hand the settings to the modules that use them
+def apply_config(settings):
+    import camera_handler
+    import kiosk_core
+    import metrics_server
+    import ntp_sync
+    import rtc_handler_manual as rtc_handler
+    import uart_handler
+
+    kiosk_core.DEVICE_ID = settings["device"]["id"]
+    kiosk_core.SAVE_PATH = settings["storage"]["save_path"]
+    kiosk_core.STATS_PATH = settings["storage"]["stats_path"]
+    kiosk_core.BUTTON_ENABLED = settings["button"]["enabled"]
+    kiosk_core.BUTTON_PIN = settings["button"]["pin"]
+    kiosk_core.PRESS_DURATION_THRESHOLD = settings["button"]["press_duration"]
+
+    for role, camera in settings["cameras"].items():
+        camera = dict(camera)
+        camera_handler.CAMERA_ROLES[role] = camera.pop("device")
+        camera_handler.CAMERA_SETTINGS[role] = camera
+
+    uart = settings["uart"]
+    uart_handler.SERIAL_PORT = uart["port"]
+    uart_handler.BAUDRATE = uart["baudrate"]
+    uart_handler.SERIAL_TIMEOUT = uart["timeout"]
+    kiosk_core.uart_options.clear()
+    kiosk_core.uart_options.update(convert_driver_options(uart["driver"], uart["driver_options"]))
+    kiosk_core.uart_options["driver_name"] = uart["driver"]
+    if uart["replay_file"]:
+        kiosk_core.uart_options["replay_file"] = uart["replay_file"]
+
+    rtc = settings["rtc"]
+    rtc_handler.PCF8523_ADDRESS = rtc["address"]
+    if os.environ.get("MIDDAYMEAL_CLOCK_BACKEND"):
+        pass  # Chosen for this run from the environment, e.g. for testing without the chip
+    elif rtc["backend"] == "pcf8523":
+        rtc_handler.set_clock_backend("pcf8523", bus_number=rtc["bus"])
+    else:
+        rtc_handler.set_clock_backend(rtc["backend"])
+
+    ntp_sync.NTP_SERVERS[:] = settings["ntp"]["servers"]  # Also the default argument of the sync functions
+
+    metrics_server.METRICS_ENABLED = settings["metrics"]["enabled"]
+    metrics_server.METRICS_HOST = settings["metrics"]["host"]
+    metrics_server.METRICS_PORT = settings["metrics"]["port"]
+
+# Function to load the configuration and apply it; returns the settings
+def load_and_apply(path=None, device=None):
+    settings = load_config(path, device)
+    apply_config(settings)
+    return settings
@@ -0,0 +1,295 @@
+#benchmark_pipeline.py
+# End-to-end benchmark of the monitoring pipeline on recorded inputs.
+# Recorded (or generated) camera footage and a recorded scale trace are fed
+# through the same code the kiosk runs: frame capture, face analysis, display
+# rendering, UART parsing and saving the record image. Per-stage latency
+# percentiles, display FPS, CPU use and memory are printed and written as JSON,
+# so runs on different commits can be compared.
+#
+# Usage:
+#     python benchmark_pipeline.py --face mjpeg:face.mjpeg --plate mjpeg:plate.mjpeg \
+#         --trace scale.trace --seconds 30 --output results.json
+#     python benchmark_pipeline.py ... --compare baseline.json
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import tempfile
+import threading
+import time
+
+import cv2
+
+import camera_handler
+import frame_pipeline
+import kiosk_core
+import scale_drivers
+import serial_replay
+
+# Size each camera is drawn at on a 1920x1080 screen (see TestMain.update_display)
+DEFAULT_DISPLAY_SIZE = (940, 520)
+
+# Function to return the value at percentile p (0-100) of a sorted list
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    index = min(int(len(sorted_values) * p / 100), len(sorted_values) - 1)
+    return sorted_values[index]
+
+# Function to summarise a list of durations (seconds) in milliseconds
+def summarize(durations):
+    values = sorted(durations)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values) * 1000, 3),
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3),
+    }
+
+# Function to read the current resident set size in MB (None where /proc is unavailable)
+def current_rss_mb():
+    try:
+        with open("/proc/self/status") as status_file:
+            for line in status_file:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+# Function to get the commit being benchmarked, so results can be told apart
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+# Function to load the face detector with the kiosk's own loader
+def load_face_cascade():
+    kiosk_core.load_face_cascade()
+    if kiosk_core.face_cascade is None:
+        print("Face detector not available, face analysis stage skips detection")
+    return kiosk_core.face_cascade
+
+# Replays a scale trace through a scale driver on its own thread, like
+# uart_handler.read_weight_from_uart, timing how long each chunk takes to parse
+class UartReplay:
+    def __init__(self, trace, driver_name="ascii_stream", speed=1.0):
+        self.ser = serial_replay.ReplaySerial(trace, speed=speed, timeout=0.5, loop=True)
+        self.driver = scale_drivers.get_scale_driver(driver_name)
+        self.weight = "Non"
+        self.readings = 0
+        self.parse_times = []
+        self.running = True
+
+    def run(self):
+        while self.running:
+            chunk = self.driver.read(self.ser)
+            if not chunk:
+                continue
+            start = time.perf_counter()
+            readings = self.driver.feed(chunk)
+            self.parse_times.append(time.perf_counter() - start)
+            if readings:
+                self.readings += len(readings)
+                self.weight = readings[-1]
+
+    def start(self):
+        thread = threading.Thread(target=self.run, daemon=True, name="uart-replay")
+        thread.start()
+        return thread
+
+# Function to run the pipeline for a number of seconds and collect the results.
+# display_fps paces display ticks like root.after() does in the kiosk (0 = as
+# fast as possible); every save_every-th tick also builds and saves a record image.
+# Like TestMain.update_display, a tick only analyzes and renders a camera that
+# has a new frame, so "analyze" and "render" are timed on the ticks that do
+# that work and "tick" on all of them.
+def run_benchmark(face_source, plate_source, trace=None, driver_name="ascii_stream", seconds=10,
+                  display_fps=20, display_size=DEFAULT_DISPLAY_SIZE, save_every=20, save_path=None):
+    camera_handler.CAMERA_ROLES["face"] = face_source
+    camera_handler.CAMERA_ROLES["plate"] = plate_source
+    face_cascade = load_face_cascade()
+    save_path = save_path or tempfile.mkdtemp(prefix="pipeline-bench-")
+
+    pause_event = threading.Event()
+    pause_event.set()
+    captures = [camera_handler.CameraCapture(role, pause_event) for role in ("face", "plate")]
+    for capture in captures:
+        capture.cap = camera_handler.open_camera(capture.role)
+        if capture.cap is None:
+            raise RuntimeError(f"Could not open {capture.role} source {camera_handler.CAMERA_ROLES[capture.role]}")
+        capture.start()
+    uart = None
+    if trace:
+        uart = UartReplay(trace, driver_name)
+        uart.start()
+
+    stages = {name: [] for name in ("capture", "analyze", "render", "save", "tick")}
+    panels = frame_pipeline.PanelFrames()
+    new_frames = 0
+    unchanged_panels = 0
+    ticks = 0
+    saves = 0
+    interval = 1.0 / display_fps if display_fps else 0
+
+    # Let the cameras deliver their first frames before timing starts
+    for capture in captures:
+        capture.get_frame(fresh=True, timeout=5)
+
+    usage_start = resource.getrusage(resource.RUSAGE_SELF)
+    start = time.perf_counter()
+    end = start + seconds
+    next_tick = start
+    while time.perf_counter() < end:
+        tick_start = time.perf_counter()
+        frames = []
+        for capture in captures:
+            frame, seq = capture.get_frame_with_seq(scale=capture.display_scale)
+            camera_state = camera_handler.get_camera_state(capture.role) if frame is None else None
+            if panels.is_current(capture.role, frame, seq, camera_state):
+                unchanged_panels += 1
+                frame = None  # Already on screen, nothing to draw
+            elif frame is not None:
+                new_frames += 1
+            frames.append(frame)
+        capture_done = time.perf_counter()
+        stages["capture"].append(capture_done - tick_start)
+
+        face_frame, plate_frame = frames
+        if face_frame is not None:
+            face_frame = frame_pipeline.annotate_face_frame(face_frame, display_size, face_cascade)
+            analyze_done = time.perf_counter()
+            stages["analyze"].append(analyze_done - capture_done)
+        else:
+            analyze_done = capture_done
+
+        if face_frame is not None or plate_frame is not None:
+            if face_frame is not None:
+                frame_pipeline.to_display_image(face_frame)
+            if plate_frame is not None:
+                frame_pipeline.to_display_image(plate_frame, display_size)
+            stages["render"].append(time.perf_counter() - analyze_done)
+
+        ticks += 1
+        if save_every and ticks % save_every == 0:
+            save_start = time.perf_counter()
+            frame1 = captures[0].get_frame()
+            frame2 = captures[1].get_frame()
+            if frame1 is not None and frame2 is not None:
+                weight = uart.weight if uart else "Non"
+                image = frame_pipeline.build_record_image(frame1, frame2, "00000000_000000", weight, "Bench", saves)
+                frame_pipeline.save_record_image(image, save_path, f"bench_{saves}.jpg")
+                saves += 1
+            stages["save"].append(time.perf_counter() - save_start)
+        tick_done = time.perf_counter()
+        stages["tick"].append(tick_done - tick_start)
+
+        if interval:
+            next_tick = max(next_tick + interval, tick_done)
+            time.sleep(max(next_tick - time.perf_counter(), 0))
+
+    elapsed = time.perf_counter() - start
+    usage_end = resource.getrusage(resource.RUSAGE_SELF)
+    for capture in captures:
+        capture.release()
+    if uart:
+        uart.running = False
+
+    cpu_seconds = (usage_end.ru_utime - usage_start.ru_utime) + (usage_end.ru_stime - usage_start.ru_stime)
+    results = {
+        "commit": git_commit(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": platform.machine(),
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "config": {
+            "face": str(face_source),
+            "plate": str(plate_source),
+            "trace": trace,
+            "driver": driver_name,
+            "seconds": seconds,
+            "display_fps": display_fps,
+            "display_size": list(display_size),
+            "save_every": save_every,
+            "face_detector": face_cascade is not None,
+        },
+        "stages": {name: summarize(durations) for name, durations in stages.items()},
+        "display_fps": round(ticks / elapsed, 2),
+        "new_frames_per_second": round(new_frames / elapsed, 2),
+        "unchanged_panels_per_second": round(unchanged_panels / elapsed, 2),
+        "cameras": {
+            capture.role: {
+                "grabbed_per_second": round(capture.frames_grabbed / elapsed, 2),
+                "decoded_per_second": round(capture.frames_decoded / elapsed, 2),
+            } for capture in captures
+        },
+        "saves": saves,
+        "cpu_percent": round(cpu_seconds / elapsed * 100, 1),
+        "rss_mb": current_rss_mb(),
+        "max_rss_mb": round(usage_end.ru_maxrss / 1024, 1),  # ru_maxrss is in KB on Linux
+    }
+    if uart:
+        results["stages"]["uart_parse"] = summarize(uart.parse_times)
+        results["uart_readings_per_second"] = round(uart.readings / elapsed, 2)
+    return results
+
+# Function to print a results summary, with the change from a baseline run if given
+def print_results(results, baseline=None):
+    print(f"Commit {results['commit']}, {results['config']['seconds']} s, "
+          f"display {results['display_fps']} FPS, new frames {results['new_frames_per_second']}/s, "
+          f"CPU {results['cpu_percent']}%, RSS {results['rss_mb']} MB (max {results['max_rss_mb']} MB)")
+    print(f"{'stage':<12}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, summary in results["stages"].items():
+        if not summary["count"]:
+            continue
+        line = f"{name:<12}{summary['count']:>8}"
+        for key in ("p50_ms", "p95_ms", "p99_ms", "max_ms"):
+            line += f"{summary[key]:>10.2f}"
+        if baseline and baseline["stages"].get(name, {}).get("count"):
+            before = baseline["stages"][name]["p95_ms"]
+            if before:
+                line += f"   p95 {(summary['p95_ms'] - before) / before * 100:+.1f}% vs {baseline['commit']}"
+        print(line)
+
+# Function to parse a WIDTHxHEIGHT argument
+def parse_size(text):
+    width, _, height = text.lower().partition("x")
+    return int(width), int(height)
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark on recorded inputs")
+    parser.add_argument("--face", default="pattern:", help="face camera source, e.g. mjpeg:face.mjpeg")
+    parser.add_argument("--plate", default="pattern:", help="plate camera source")
+    parser.add_argument("--trace", help="recorded scale trace (see serial_replay.py)")
+    parser.add_argument("--driver", default="ascii_stream", choices=list(scale_drivers.SCALE_DRIVERS))
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--display-fps", type=float, default=20, help="0 runs display ticks back to back")
+    parser.add_argument("--display-size", type=parse_size, default=DEFAULT_DISPLAY_SIZE)
+    parser.add_argument("--save-every", type=int, default=20, help="save a record image every N ticks, 0 to skip")
+    parser.add_argument("--save-path", help="folder for saved images (default: a temporary folder)")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="results JSON of an earlier run to compare against")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.face, args.plate, args.trace, args.driver, args.seconds,
+                            args.display_fps, args.display_size, args.save_every, args.save_path)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+    print_results(results, baseline)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
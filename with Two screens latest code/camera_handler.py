@@ -0,0 +1,459 @@
+#camera_handler.py
+# Opening and reconnecting the USB cameras.
+# A missing camera is retried with exponential backoff instead of a tight loop,
+# then every policy.max_delay seconds, and a newly plugged-in /dev/video*
+# device triggers an immediate retry.
+# The state of every camera is published in camera_states for the UI.
+#
+# Cameras are addressed by role ("face", "plate") rather than by index, since
+# /dev/videoN numbering changes between boots. CAMERA_ROLES maps each role to a
+# stable name under /dev/v4l/by-id or /dev/v4l/by-path. Run
+#     python camera_handler.py
+# on a device to list the names of the connected cameras.
+import cv2
+import glob
+import os
+import threading
+import time
+
+import camera_sources  # Recorded and generated stand-ins for cameras
+import stage_timing  # Hot-path timing histograms
+
+# Camera states
+CAMERA_CONNECTED = "connected"
+CAMERA_RECONNECTING = "reconnecting"
+CAMERA_FAILED = "failed"  # Backoff exhausted, retried slowly or when a new video device appears
+
+# Which camera plays which role. A value can be:
+#   "by-id:<name>"   - /dev/v4l/by-id/<name>, follows the camera's USB serial number
+#   "by-path:<name>" - /dev/v4l/by-path/<name>, follows the USB port it is plugged into
+#   "/dev/videoN"    - a device node
+#   N (int)          - an OpenCV index; not stable across reboots, kept as the fallback
+#   "mjpeg:<file>", "video:<file>", "dir:<folder of JPEGs>", "pattern:"
+#                    - recorded or generated footage, see camera_sources.py
+# UVC cameras expose two nodes each (video + metadata), hence indices 0 and 2.
+# These are the defaults; the cameras section of the config file (app_config.py) replaces them.
+CAMERA_ROLES = {
+    "face": 0,
+    "plate": 2,
+}
+
+# Capture settings per role, applied after opening and read back to verify.
+# MJPG keeps two cameras within the bandwidth of one USB controller (raw YUYV
+# does not), and a single driver buffer means we always get the newest frame.
+# exposure: None leaves auto exposure on; a number sets manual exposure in the
+# driver's units.
+# raw_mjpeg (optional): keep the camera's JPEG buffers undecoded
+# (CAP_PROP_CONVERT_RGB off) and decode only frames that are shown or saved.
+# Only used when the driver really delivers MJPG; otherwise OpenCV converts the
+# frames as usual. display_scale (1, 2, 4 or 8) decodes displayed frames at
+# reduced size straight from the JPEG data in raw mode.
+CAMERA_SETTINGS = {
+    "face": {"fourcc": "MJPG", "width": 320, "height": 240, "fps": 15, "buffer_size": 1, "exposure": None,
+             "raw_mjpeg": False, "display_scale": 1},
+    "plate": {"fourcc": "MJPG", "width": 320, "height": 240, "fps": 15, "buffer_size": 1, "exposure": None,
+              "raw_mjpeg": False, "display_scale": 1},
+}
+
+# imdecode flags for decoding a JPEG at reduced scale (the decoder skips the work, not a resize)
+JPEG_SCALE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+# V4L2 auto exposure modes as exposed by OpenCV's CAP_PROP_AUTO_EXPOSURE
+V4L2_EXPOSURE_MANUAL = 1
+V4L2_EXPOSURE_AUTO = 3
+
+# Cache of resolved devices: role -> device node (or index) passed to cv2.VideoCapture
+resolved_cameras = {}
+
+# Per-camera state: role -> {"state", "attempts", "next_retry" (seconds), "since" (time.time()),
+#                            "device", "negotiated" (settings the driver accepted)}
+camera_states = {}
+# Settings the driver actually accepted for each role
+negotiated_settings = {}
+camera_states_lock = threading.Lock()
+
+# How often to look for newly plugged-in video devices while waiting
+HOTPLUG_POLL_INTERVAL = 0.5
+
+# Retry schedule for a camera that is not available
+class ReconnectPolicy:
+    def __init__(self, initial_delay=0.5, max_delay=30.0, multiplier=2.0, max_attempts=8):
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.max_attempts = max_attempts  # None retries forever
+
+    # Seconds to wait after the given number of failed attempts
+    def delay(self, attempts):
+        return min(self.initial_delay * self.multiplier ** (attempts - 1), self.max_delay)
+
+DEFAULT_RECONNECT_POLICY = ReconnectPolicy()
+
+# Function to publish the state of a camera
+def set_camera_state(role, state, attempts=0, next_retry=None):
+    with camera_states_lock:
+        previous = camera_states.get(role)
+        since = previous["since"] if previous and previous["state"] == state else time.time()
+        camera_states[role] = {"state": state, "attempts": attempts, "next_retry": next_retry,
+                               "since": since, "device": resolved_cameras.get(role),
+                               "negotiated": negotiated_settings.get(role)}
+
+# Function to get the state of a camera ("unknown" if it was never opened)
+def get_camera_state(role):
+    with camera_states_lock:
+        return camera_states.get(role, {}).get("state", "unknown")
+
+# Function to turn a CAMERA_ROLES entry into a device node or index, or None if it is not present
+def resolve_camera_identifier(identifier):
+    if isinstance(identifier, int):
+        return identifier
+    if camera_sources.is_source_spec(identifier):
+        return identifier
+    kind, _, name = identifier.partition(":")
+    if kind in ("by-id", "by-path"):
+        link = os.path.join("/dev/v4l", kind, name)
+        if not os.path.exists(link):
+            return None
+        return os.path.realpath(link)
+    return identifier if os.path.exists(identifier) else None
+
+# Function to get the device for a role, resolving it on first use and caching it
+def resolve_camera(role):
+    if role not in resolved_cameras or resolved_cameras[role] is None:
+        device = resolve_camera_identifier(CAMERA_ROLES[role])
+        resolved_cameras[role] = device
+        if device is not None:
+            print(f"Camera '{role}' ({CAMERA_ROLES[role]}) is {device}")
+    return resolved_cameras[role]
+
+# Function to forget the cached device of a role, e.g. after it was unplugged
+def forget_camera(role):
+    resolved_cameras.pop(role, None)
+
+# Function to list the connected cameras with their stable names
+def list_cameras():
+    cameras = []
+    for node in sorted(glob.glob("/sys/class/video4linux/video*")):
+        device = "/dev/" + os.path.basename(node)
+        try:
+            with open(os.path.join(node, "name")) as name_file:
+                name = name_file.read().strip()
+        except OSError:
+            name = "?"
+        links = [f"{kind}:{os.path.basename(link)}"
+                 for kind in ("by-id", "by-path")
+                 for link in glob.glob(f"/dev/v4l/{kind}/*")
+                 if os.path.realpath(link) == device]
+        cameras.append((device, name, links))
+    return cameras
+
+# Function to turn an OpenCV FOURCC code back into its four characters
+def decode_fourcc(code):
+    code = int(code)
+    return "".join(chr((code >> (8 * i)) & 0xFF) for i in range(4))
+
+# Function to apply the capture settings of a role and read back what the driver accepted.
+# The pixel format has to be set before the frame size on V4L2, so the order matters.
+def apply_capture_settings(cap, role):
+    settings = CAMERA_SETTINGS.get(role, {})
+    if settings.get("fourcc"):
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*settings["fourcc"]))
+    if settings.get("width"):
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, settings["width"])
+    if settings.get("height"):
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, settings["height"])
+    if settings.get("fps"):
+        cap.set(cv2.CAP_PROP_FPS, settings["fps"])
+    if settings.get("buffer_size"):
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, settings["buffer_size"])
+    if settings.get("exposure") is not None:
+        cap.set(cv2.CAP_PROP_AUTO_EXPOSURE, V4L2_EXPOSURE_MANUAL)
+        cap.set(cv2.CAP_PROP_EXPOSURE, settings["exposure"])
+    else:
+        # V4L2 controls outlive the process, so undo a manual exposure left by an earlier run
+        cap.set(cv2.CAP_PROP_AUTO_EXPOSURE, V4L2_EXPOSURE_AUTO)
+    if settings.get("raw_mjpeg"):
+        cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+
+    negotiated = {
+        "fourcc": decode_fourcc(cap.get(cv2.CAP_PROP_FOURCC)),
+        "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        "fps": cap.get(cv2.CAP_PROP_FPS),
+        "buffer_size": int(cap.get(cv2.CAP_PROP_BUFFERSIZE)),
+        "exposure": cap.get(cv2.CAP_PROP_EXPOSURE),
+    }
+    negotiated["raw_mjpeg"] = bool(settings.get("raw_mjpeg")) and negotiated["fourcc"] == "MJPG"
+    if settings.get("raw_mjpeg") and not negotiated["raw_mjpeg"]:
+        # Without conversion a YUYV (or other) frame comes back as an unusable
+        # 1xN buffer, so let OpenCV convert it after all
+        cap.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+    negotiated_settings[role] = negotiated
+
+    mismatches = [f"{key}={negotiated[key]} (wanted {wanted})"
+                  for key, wanted in settings.items()
+                  if wanted is not None and key in negotiated and key != "exposure" and negotiated[key] != wanted]
+    print(f"Camera '{role}' negotiated {negotiated['width']}x{negotiated['height']} "
+          f"{negotiated['fourcc']} @ {negotiated['fps']:g} fps, {negotiated['buffer_size']} buffer(s)")
+    if mismatches:
+        print(f"Camera '{role}' did not accept: {', '.join(mismatches)}")
+    return negotiated
+
+# Function to tell whether retrieve() returned an undecoded JPEG buffer rather than an image
+def is_jpeg_buffer(frame):
+    return (frame is not None and frame.ndim <= 2 and min(frame.shape) == 1
+            and frame.size > 2 and frame.flat[0] == 0xFF and frame.flat[1] == 0xD8)
+
+# Function to decode a JPEG buffer, optionally at 1/2, 1/4 or 1/8 scale
+def decode_jpeg(buffer, scale=1):
+    return cv2.imdecode(buffer.reshape(-1), JPEG_SCALE_FLAGS.get(scale, cv2.IMREAD_COLOR))
+
+# Function to list the video device nodes currently present
+def list_video_devices():
+    return set(glob.glob("/dev/video*"))
+
+# Function to open the camera of a role once, without retrying; returns None if it is not available
+def open_camera(role):
+    device = resolve_camera(role)
+    if device is None:
+        return None
+    try:
+        if isinstance(device, int):
+            cap = cv2.VideoCapture(device)
+        elif camera_sources.is_source_spec(device):
+            cap = camera_sources.open_source(device)
+        else:
+            cap = cv2.VideoCapture(device, cv2.CAP_V4L2)
+        if cap.isOpened():
+            apply_capture_settings(cap, role)
+            set_camera_state(role, CAMERA_CONNECTED)
+            return cap
+        cap.release()
+    except Exception as e:
+        print(f"Error opening camera '{role}' ({device}): {e}")
+    forget_camera(role)  # The node may have been renumbered, resolve again next time
+    return None
+
+# Function to sleep for up to `delay` seconds, returning early if a new video
+# device appears or stop_event is set. Returns True if a new device appeared.
+def wait_for_video_device(delay, known_devices, stop_event=None):
+    deadline = time.monotonic() + delay
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        if stop_event is not None and stop_event.is_set():
+            return False
+        time.sleep(min(HOTPLUG_POLL_INTERVAL, remaining))
+        if list_video_devices() - known_devices:
+            return True
+
+# Function to reconnect camera with exponential backoff.
+# Returns the opened capture, or None after policy.max_attempts failures
+# (or when stop_event is set).
+def reconnect_camera(role, policy=DEFAULT_RECONNECT_POLICY, stop_event=None):
+    attempts = 0
+    while stop_event is None or not stop_event.is_set():
+        known_devices = list_video_devices()
+        cap = open_camera(role)
+        if cap is not None:
+            print(f"Camera '{role}' reconnected successfully after {attempts} failed attempts.")
+            return cap
+        attempts += 1
+        if policy.max_attempts is not None and attempts >= policy.max_attempts:
+            print(f"Camera '{role}' still unavailable after {attempts} attempts, "
+                  f"retrying every {policy.max_delay:g} s or when a device is plugged in.")
+            set_camera_state(role, CAMERA_FAILED, attempts)
+            return None
+        delay = policy.delay(attempts)
+        set_camera_state(role, CAMERA_RECONNECTING, attempts, delay)
+        if wait_for_video_device(delay, known_devices, stop_event):
+            print(f"New video device detected, retrying camera '{role}'.")
+    return None
+
+# Function to block until a new video device is plugged in, timeout seconds
+# have passed (None waits indefinitely) or stop_event is set.
+# Returns True if a new device appeared.
+def wait_for_hotplug(stop_event=None, timeout=None):
+    known_devices = list_video_devices()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while stop_event is None or not stop_event.is_set():
+        wait = 60 if deadline is None else deadline - time.monotonic()
+        if wait <= 0:
+            return False
+        if wait_for_video_device(min(wait, 60), known_devices, stop_event):
+            return True
+    return False
+
+# Capture loop for one camera, run in its own thread.
+# Frames are grabbed at no more than target_fps. With decode_on_demand, a
+# grabbed frame is only decoded (retrieve) when a consumer has asked for one
+# since the last decode, so frames nobody looks at cost no decode time.
+class CameraCapture:
+    def __init__(self, role, pause_event=None, target_fps=None, decode_on_demand=True,
+                 policy=DEFAULT_RECONNECT_POLICY):
+        self.role = role
+        self.pause_event = pause_event
+        self.policy = policy
+        self.stop_event = threading.Event()  # Set by release() to end the loop, also while reconnecting
+        self.retries_exhausted = False
+        self.requested_fps = target_fps
+        self.target_fps = None  # Resolved by load_settings()
+        self.decode_on_demand = decode_on_demand
+        self.cap = None
+        self.running = True
+        self.frame = None
+        self.frame_seq = 0  # Increases with every new decoded frame
+        self.frame_time = None  # time.monotonic() of the latest decoded frame
+        self.frames_grabbed = 0
+        self.frames_decoded = 0
+        self.frames_dropped = 0  # Frames the camera delivered that the loop was too late to grab
+        self.last_grab_time = None
+        self.frame_wanted = threading.Event()
+        self.frame_condition = threading.Condition()
+        # Raw MJPEG mode: self.frame holds the JPEG buffer and consumers decode it
+        self.display_scale = 1
+        self.decoded_cache = {}  # scale -> (frame_seq, image), so a frame is decoded once per scale
+        self.decode_lock = threading.Lock()
+        self.load_settings()
+
+    # Function to take the frame rate and display scale from CAMERA_SETTINGS.
+    # Called again by start(), since the captures are created at import time,
+    # before app_config has applied the config file.
+    def load_settings(self):
+        settings = CAMERA_SETTINGS.get(self.role, {})
+        self.target_fps = self.requested_fps or settings.get("fps")
+        self.display_scale = settings.get("display_scale", 1)
+
+    # Function to get the latest decoded frame (None if the camera is lost).
+    # With fresh=True, waits up to timeout seconds for a frame captured after this call.
+    # scale decodes raw MJPEG frames at 1/2, 1/4 or 1/8 size; decoded frames are returned as is.
+    def get_frame(self, fresh=False, timeout=1.0, scale=1):
+        return self.get_frame_with_seq(fresh, timeout, scale)[0]
+
+    # Same as get_frame, but also returns the frame's sequence number
+    def get_frame_with_seq(self, fresh=False, timeout=1.0, scale=1):
+        self.frame_wanted.set()
+        with self.frame_condition:
+            if fresh:
+                seq = self.frame_seq
+                self.frame_condition.wait_for(lambda: self.frame_seq != seq, timeout)
+            frame, seq = self.frame, self.frame_seq
+        if is_jpeg_buffer(frame):
+            frame = self._decode(frame, seq, scale)
+        return frame, seq
+
+    # Decode a raw JPEG frame on the consumer's thread, once per frame and scale
+    def _decode(self, buffer, seq, scale):
+        with self.decode_lock:
+            cached_seq, image = self.decoded_cache.get(scale, (None, None))
+            if cached_seq != seq:
+                with stage_timing.timed(f"camera.{self.role}.decode"):
+                    image = decode_jpeg(buffer, scale)
+                self.decoded_cache[scale] = (seq, image)
+                self.frames_decoded += 1
+            return image
+
+    def _store_frame(self, frame):
+        with self.frame_condition:
+            self.frame = frame
+            if frame is not None:
+                self.frame_seq += 1
+                self.frame_time = time.monotonic()
+            self.frame_condition.notify_all()
+
+    def _camera_lost(self):
+        stage_timing.count(f"camera.{self.role}.lost")
+        self.cap.release()
+        self.cap = None  # Force reconnection if capturing fails
+        self.last_grab_time = None
+        self._store_frame(None)  # Don't keep showing the last frame of a lost camera
+        set_camera_state(self.role, CAMERA_RECONNECTING)
+
+    def run(self):
+        interval = 1.0 / self.target_fps if self.target_fps else 0
+        next_grab = time.monotonic()
+        while self.running and not self.stop_event.is_set():
+            if self.pause_event is not None and not self.pause_event.is_set():
+                self.last_grab_time = None  # Frames missed while paused are not drops
+                # Wait here if operations are paused, but let release() end the loop
+                while not self.pause_event.wait(0.5):
+                    if self.stop_event.is_set():
+                        return
+            if self.cap is None or not self.cap.isOpened():
+                self._reconnect()
+                continue
+
+            if interval:
+                delay = next_grab - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                next_grab = max(next_grab + interval, time.monotonic())
+
+            grab_start = time.monotonic()
+            if not self.cap.grab():
+                self._camera_lost()
+                continue
+            grab_done = time.monotonic()
+            stage_timing.record(f"camera.{self.role}.grab", grab_done - grab_start)
+            if interval and self.last_grab_time is not None:
+                # A gap of several frame intervals means the camera's frames in between were lost
+                self.frames_dropped += max(int((grab_done - self.last_grab_time) / interval + 0.5) - 1, 0)
+            self.last_grab_time = grab_done
+            self.frames_grabbed += 1
+
+            if self.decode_on_demand:
+                if not self.frame_wanted.is_set():
+                    continue
+                self.frame_wanted.clear()
+            retrieve_start = time.monotonic()
+            ret, frame = self.cap.retrieve()
+            stage_timing.record(f"camera.{self.role}.retrieve", time.monotonic() - retrieve_start)
+            if not ret:
+                self._camera_lost()
+                continue
+            if not is_jpeg_buffer(frame):
+                self.frames_decoded += 1  # Decoded by OpenCV inside retrieve()
+            self._store_frame(frame)
+
+    # Function to reopen the camera: with backoff first, then every
+    # policy.max_delay seconds (a node that exists but fails to open, e.g. busy,
+    # still gets retried), or at once when a video device is plugged in
+    def _reconnect(self):
+        if not self.retries_exhausted:
+            self.cap = reconnect_camera(self.role, self.policy, self.stop_event)
+            self.retries_exhausted = self.cap is None
+            return
+        set_camera_state(self.role, CAMERA_FAILED, self.policy.max_attempts, self.policy.max_delay)
+        if wait_for_hotplug(self.stop_event, self.policy.max_delay):
+            print(f"New video device detected, retrying camera '{self.role}'.")
+        if self.stop_event.is_set():
+            return
+        self.cap = open_camera(self.role)
+        if self.cap is not None:
+            print(f"Camera '{self.role}' reconnected successfully.")
+            self.retries_exhausted = False
+
+    # Function to start the capture loop in a daemon thread
+    def start(self):
+        self.load_settings()
+        thread = threading.Thread(target=self.run, daemon=True, name=f"capture-{self.role}")
+        thread.start()
+        return thread
+
+    def release(self):
+        self.running = False
+        self.stop_event.set()
+        if self.cap is not None:
+            self.cap.release()
+
+if __name__ == "__main__":
+    for device, name, links in list_cameras():
+        print(f"{device}: {name}")
+        for link in links:
+            print(f"    {link}")
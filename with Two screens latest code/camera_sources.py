@@ -0,0 +1,268 @@
+#camera_sources.py
+# Stand-ins for cv2.VideoCapture that play back recorded footage or a generated
+# test pattern instead of a live camera, so the kiosk and the benchmarks run on
+# machines without webcams. They implement the parts of the VideoCapture API
+# the app uses (isOpened, grab, retrieve, read, set, get, release).
+#
+# Usage:
+#     python camera_sources.py bench-mjpeg recording.mjpeg
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+
+JPEG_START = b"\xff\xd8"
+JPEG_END = b"\xff\xd9"
+
+# Function to split a .mjpeg file (JPEG images back to back, as saved from an
+# MJPEG camera or `ffmpeg -c:v copy -f mjpeg`) into the individual JPEG images
+def split_mjpeg(data):
+    frames = []
+    start = data.find(JPEG_START)
+    while start >= 0:
+        end = data.find(JPEG_END, start + 2)
+        if end < 0:
+            break
+        frames.append(data[start:end + 2])
+        start = data.find(JPEG_START, end + 2)
+    return frames
+
+# Base class for the stand-ins: paces grab() at the configured frame rate like
+# a real camera and loops the recording when it reaches the end
+class PacedCapture:
+    def __init__(self, fps=15, loop=True):
+        self.fps = fps
+        self.loop = loop
+        self.convert_rgb = True
+        self.width = 0
+        self.height = 0
+        self.opened = True
+        self.next_frame_time = None
+
+    def isOpened(self):
+        return self.opened
+
+    # Move to the next frame; returns False at the end of a non-looping recording
+    def advance(self):
+        raise NotImplementedError
+
+    # Wait for the next frame to be "captured", paced at self.fps like a real camera
+    def grab(self):
+        if not self.opened:
+            return False
+        if self.fps:
+            now = time.monotonic()
+            if self.next_frame_time is None:
+                self.next_frame_time = now
+            elif now < self.next_frame_time:
+                time.sleep(self.next_frame_time - now)
+            self.next_frame_time = max(self.next_frame_time + 1.0 / self.fps, time.monotonic())
+        if not self.advance():
+            self.opened = False
+            return False
+        return True
+
+    def retrieve(self):
+        raise NotImplementedError
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_CONVERT_RGB:
+            self.convert_rgb = bool(value)
+        elif prop == cv2.CAP_PROP_FPS:
+            self.fps = value
+        elif prop == cv2.CAP_PROP_FRAME_WIDTH:
+            self.width = int(value)
+        elif prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            self.height = int(value)
+        else:
+            return False
+        return True
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.fps)
+        if prop == cv2.CAP_PROP_CONVERT_RGB:
+            return float(self.convert_rgb)
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height)
+        if prop == cv2.CAP_PROP_BUFFERSIZE:
+            return 1.0
+        return 0.0
+
+    def release(self):
+        self.opened = False
+
+# Plays a list of JPEG images. Like a V4L2 camera in MJPG mode, retrieve()
+# returns the undecoded JPEG buffer when CAP_PROP_CONVERT_RGB is 0 and a decoded
+# BGR image otherwise. The frame size is that of the recording.
+class JpegFramesCapture(PacedCapture):
+    def __init__(self, jpeg_frames, fps=15, loop=True):
+        super().__init__(fps, loop)
+        self.frames = [np.frombuffer(frame, dtype=np.uint8).reshape(1, -1) for frame in jpeg_frames]
+        self.position = -1
+        self.opened = bool(self.frames)
+        if self.frames:
+            self.height, self.width = cv2.imdecode(self.frames[0].reshape(-1), cv2.IMREAD_GRAYSCALE).shape
+
+    def advance(self):
+        self.position += 1
+        if self.position >= len(self.frames):
+            if not self.loop:
+                return False
+            self.position = 0
+        return True
+
+    def retrieve(self):
+        if self.position < 0 or not self.opened:
+            return False, None
+        buffer = self.frames[self.position]
+        if not self.convert_rgb:
+            return True, buffer.copy()
+        return True, cv2.imdecode(buffer.reshape(-1), cv2.IMREAD_COLOR)
+
+    def set(self, prop, value):
+        if prop in (cv2.CAP_PROP_FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT):
+            return False  # Fixed by the recording
+        return super().set(prop, value)
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FOURCC:
+            return float(cv2.VideoWriter_fourcc(*"MJPG"))
+        return super().get(prop)
+
+# Plays a recorded MJPEG stream (.mjpeg file)
+class MjpegFileCapture(JpegFramesCapture):
+    def __init__(self, path, fps=15, loop=True):
+        with open(path, "rb") as mjpeg_file:
+            super().__init__(split_mjpeg(mjpeg_file.read()), fps, loop)
+
+# Plays a directory of JPEG images in file name order
+class JpegDirectoryCapture(JpegFramesCapture):
+    def __init__(self, path, fps=15, loop=True):
+        frames = []
+        for name in sorted(os.listdir(path)):
+            if name.lower().endswith((".jpg", ".jpeg")):
+                with open(os.path.join(path, name), "rb") as jpeg_file:
+                    frames.append(jpeg_file.read())
+        super().__init__(frames, fps, loop)
+
+# Plays any video file OpenCV can read, paced at its own frame rate (or fps)
+class VideoFileCapture(PacedCapture):
+    def __init__(self, path, fps=None, loop=True):
+        self.video = cv2.VideoCapture(path)
+        super().__init__(fps or self.video.get(cv2.CAP_PROP_FPS) or 15, loop)
+        self.opened = self.video.isOpened()
+        self.width = int(self.video.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.video.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    def advance(self):
+        if self.video.grab():
+            return True
+        if not self.loop:
+            return False
+        self.video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        return self.video.grab()
+
+    def retrieve(self):
+        return self.video.retrieve()
+
+    def set(self, prop, value):
+        if prop in (cv2.CAP_PROP_FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT):
+            return False  # Fixed by the recording
+        return super().set(prop, value)
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FOURCC:
+            return self.video.get(cv2.CAP_PROP_FOURCC)
+        return super().get(prop)
+
+    def release(self):
+        super().release()
+        self.video.release()
+
+# Generated test pattern: colour bars, a moving bar and the frame number, so
+# dropped or stale frames are visible on screen and in saved images
+class TestPatternCapture(PacedCapture):
+    BAR_COLORS = [(255, 255, 255), (0, 255, 255), (255, 255, 0), (0, 255, 0),
+                  (255, 0, 255), (0, 0, 255), (255, 0, 0), (0, 0, 0)]
+
+    def __init__(self, width=320, height=240, fps=15):
+        super().__init__(fps, loop=True)
+        self.width = width
+        self.height = height
+        self.frame_number = -1
+        self.background = None
+
+    def advance(self):
+        self.frame_number += 1
+        return True
+
+    def retrieve(self):
+        if self.background is None or self.background.shape[:2] != (self.height, self.width):
+            self.background = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+            bar_width = max(self.width // len(self.BAR_COLORS), 1)
+            for i, color in enumerate(self.BAR_COLORS):
+                self.background[:, i * bar_width:(i + 1) * bar_width] = color
+        frame = self.background.copy()
+        x = (self.frame_number * 4) % max(self.width, 1)
+        frame[:, x:x + 4] = (128, 128, 128)
+        cv2.putText(frame, str(self.frame_number), (10, self.height - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 3)
+        return True, frame
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FOURCC:
+            return float(cv2.VideoWriter_fourcc(*"BGR3"))
+        return super().get(prop)
+
+# Source kinds that can be used in camera_handler.CAMERA_ROLES, e.g.
+#   "mjpeg:/data/face.mjpeg", "video:/data/plate.mp4", "dir:/data/frames", "pattern:"
+SOURCE_KINDS = {
+    "mjpeg": MjpegFileCapture,
+    "video": VideoFileCapture,
+    "dir": JpegDirectoryCapture,
+    "pattern": lambda path: TestPatternCapture(),
+}
+
+# Function to tell whether a camera identifier refers to a recorded or generated source
+def is_source_spec(identifier):
+    return isinstance(identifier, str) and identifier.partition(":")[0] in SOURCE_KINDS
+
+# Function to open a source from its "kind:path" spec
+def open_source(spec):
+    kind, _, path = spec.partition(":")
+    return SOURCE_KINDS[kind](path)
+
+# Function to compare full and reduced-scale decode times on a recorded MJPEG file
+def bench_mjpeg(path, repeat=5):
+    import camera_handler
+    capture = MjpegFileCapture(path, fps=0, loop=False)
+    print(f"{len(capture.frames)} frames from {path}")
+    for scale in sorted(camera_handler.JPEG_SCALE_FLAGS):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for buffer in capture.frames:
+                image = camera_handler.decode_jpeg(buffer, scale)
+        elapsed = (time.perf_counter() - start) / (repeat * len(capture.frames))
+        print(f"scale 1/{scale}: {image.shape[1]}x{image.shape[0]}, {elapsed * 1000:.2f} ms per frame")
+
+def main():
+    parser = argparse.ArgumentParser(description="Recorded camera sources")
+    commands = parser.add_subparsers(dest="command", required=True)
+    bench_parser = commands.add_parser("bench-mjpeg", help="Time JPEG decoding at each scale")
+    bench_parser.add_argument("path")
+    bench_parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    bench_mjpeg(args.path, args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#clock_backends.py
+# Clock backends for rtc_handler_manual.
+# Every backend looks like an smbus2 bus with a PCF8523 on it, so the RTC
+# handler's register and BCD code runs unchanged against each of them:
+#   pcf8523   - the real chip on I2C bus 1 (Raspberry Pi only)
+#   simulated - an in-memory PCF8523 that keeps time with a configurable drift
+#   system    - registers backed by the system clock; writes are ignored
+import time
+from datetime import datetime, timedelta
+
+# The BCD helpers are looked up when the registers are used, so this circular
+# import (rtc_handler_manual imports this module) is safe
+import rtc_handler_manual as rtc_handler
+
+# Number of registers in the PCF8523 register map
+PCF8523_REGISTER_COUNT = 0x14
+SECONDS_REGISTER = 0x03
+YEARS_REGISTER = 0x09
+
+# In-memory PCF8523. Time runs from the moment it was last set, sped up or
+# slowed down by drift_ppm (positive = chip runs fast), like a real crystal.
+class SimulatedPCF8523:
+    def __init__(self, start_time=None, drift_ppm=0.0):
+        self.drift_ppm = drift_ppm
+        self.registers = [0] * PCF8523_REGISTER_COUNT
+        self.transactions = 0  # I2C transactions served, for benchmarks
+        self._set(start_time or datetime.now())
+
+    def _set(self, value):
+        self.base_time = value.replace(microsecond=0)
+        self.base_monotonic = time.monotonic()
+
+    def now(self):
+        elapsed = (time.monotonic() - self.base_monotonic) * (1 + self.drift_ppm * 1e-6)
+        return self.base_time + timedelta(seconds=elapsed)
+
+    def _time_registers(self):
+        now = self.now()
+        dec_to_bcd = rtc_handler.dec_to_bcd
+        return [
+            dec_to_bcd(now.second),
+            dec_to_bcd(now.minute),
+            dec_to_bcd(now.hour),
+            dec_to_bcd(now.day),
+            now.isoweekday() % 7,
+            dec_to_bcd(now.month),
+            dec_to_bcd(now.year - 2000),
+        ]
+
+    def _read(self, register, length):
+        self.registers[SECONDS_REGISTER:YEARS_REGISTER + 1] = self._time_registers()
+        return self.registers[register:register + length]
+
+    def _write(self, register, values):
+        self.registers[SECONDS_REGISTER:YEARS_REGISTER + 1] = self._time_registers()
+        self.registers[register:register + len(values)] = values
+        if register <= YEARS_REGISTER and register + len(values) > SECONDS_REGISTER:
+            seconds, minutes, hours, day, _weekday, month, year = self.registers[SECONDS_REGISTER:YEARS_REGISTER + 1]
+            bcd_to_dec = rtc_handler.bcd_to_dec
+            self._set(datetime(2000 + bcd_to_dec(year), bcd_to_dec(month & 0x1F), bcd_to_dec(day & 0x3F),
+                               bcd_to_dec(hours & 0x3F), bcd_to_dec(minutes & 0x7F), bcd_to_dec(seconds & 0x7F)))
+
+    # smbus2.SMBus compatible interface
+    def read_byte_data(self, address, register):
+        self.transactions += 1
+        return self._read(register, 1)[0]
+
+    def read_i2c_block_data(self, address, register, length):
+        self.transactions += 1
+        return self._read(register, length)
+
+    def write_byte_data(self, address, register, value):
+        self.transactions += 1
+        self._write(register, [value])
+
+    def write_i2c_block_data(self, address, register, values):
+        self.transactions += 1
+        self._write(register, list(values))
+
+    def close(self):
+        pass
+
+# PCF8523 registers that always show the system clock. Writes are accepted but
+# ignored, since setting the system clock is the OS's job (chrony/timesyncd).
+class SystemClockPCF8523(SimulatedPCF8523):
+    def now(self):
+        return datetime.now()
+
+    def _write(self, register, values):
+        pass
+
+# Function to open the real I2C bus; smbus2 is only imported on the Pi
+def open_pcf8523_bus(bus_number=1):
+    import smbus2
+    return smbus2.SMBus(bus_number)
+
+# Registry of clock backends, keyed by the name used to select them
+CLOCK_BACKENDS = {
+    "pcf8523": open_pcf8523_bus,
+    "simulated": SimulatedPCF8523,
+    "system": SystemClockPCF8523,
+}
+
+# Function to create a clock backend by name
+def open_clock_backend(name, **options):
+    try:
+        factory = CLOCK_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown clock backend '{name}'. Available: {', '.join(CLOCK_BACKENDS)}")
+    return factory(**options)
@@ -0,0 +1,43 @@
+#display_refresh.py
+# Refresh scheduling for the monitoring screen. The display loop reports how
+# long each tick took and gets back the delay until the next one: ticks run at
+# the target FPS while they are cheap, and when they get expensive (slow
+# detection, a busy CPU) the rate drops so that part of every period stays idle
+# for Tk to handle key presses and redraws, instead of ticks piling up.
+#
+#     refresh = AdaptiveRefresh(target_fps=20)
+#     ...
+#     root.after(refresh.next_delay_ms(tick_cost), update_display)
+
+# Weight of the latest tick in the running average of tick cost
+COST_SMOOTHING = 0.2
+
+class AdaptiveRefresh:
+    def __init__(self, target_fps=20, min_fps=2, idle_fraction=0.3):
+        self.target_interval = 1.0 / target_fps
+        self.max_interval = 1.0 / min_fps
+        self.idle_fraction = idle_fraction  # Share of each period kept free for Tk events
+        self.average_cost = 0.0
+        self.interval = self.target_interval
+
+    # Current refresh rate in ticks per second
+    @property
+    def fps(self):
+        return 1.0 / self.interval
+
+    # Whether ticks are too slow for the target rate
+    @property
+    def degraded(self):
+        return self.interval > self.target_interval
+
+    # Function to get the delay in seconds before the next tick, given how long this one took
+    def next_delay(self, tick_cost):
+        self.average_cost += (tick_cost - self.average_cost) * COST_SMOOTHING
+        # Period in which ticks use no more than (1 - idle_fraction) of the time
+        needed_interval = self.average_cost / (1 - self.idle_fraction)
+        self.interval = min(max(self.target_interval, needed_interval), self.max_interval)
+        return max(self.interval - tick_cost, self.interval * self.idle_fraction)
+
+    # Same as next_delay, in whole milliseconds for root.after()
+    def next_delay_ms(self, tick_cost):
+        return max(int(round(self.next_delay(tick_cost) * 1000)), 1)
@@ -0,0 +1,97 @@
+#fake_ntp_server.py
+# Minimal local NTP responder for testing the RTC sync without network access.
+# It answers NTP client requests with the system time shifted by a fixed offset
+# and an optional artificial delay, which is enough to exercise ntp_sync.
+#
+# Usage:
+#     python fake_ntp_server.py --port 1123 --offset 2.5
+# and point ntp_sync at it with NTP_SERVERS = ['127.0.0.1:1123'].
+import argparse
+import socket
+import struct
+import threading
+import time
+
+# Seconds between the NTP epoch (1900) and the Unix epoch (1970)
+NTP_EPOCH_OFFSET = 2208988800
+NTP_PACKET = struct.Struct("!B B B b 11I")
+
+# Function to convert a Unix timestamp to NTP (seconds, fraction)
+def to_ntp_timestamp(unix_time):
+    ntp_time = unix_time + NTP_EPOCH_OFFSET
+    seconds = int(ntp_time)
+    return seconds, int((ntp_time - seconds) * 2 ** 32)
+
+class FakeNtpServer:
+    def __init__(self, host="127.0.0.1", port=1123, offset=0.0, delay=0.0):
+        self.offset = offset  # Seconds added to the system time in replies
+        self.delay = delay  # Seconds to wait before replying, to simulate a slow link
+        self.requests = 0
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.address = self.sock.getsockname()
+        self.running = False
+
+    def now(self):
+        return time.time() + self.offset
+
+    # Function to build a server reply for a client request
+    def build_reply(self, request, receive_time):
+        # Echo the client's transmit timestamp as our originate timestamp
+        originate = NTP_PACKET.unpack(request[:NTP_PACKET.size])[-2:]
+        version = (request[0] >> 3) & 0x07
+        transmit_time = self.now()
+        return NTP_PACKET.pack(
+            (0 << 6) | (version << 3) | 4,  # No leap warning, client's version, server mode
+            1,  # Stratum 1
+            6,  # Poll interval
+            -20,  # Precision
+            0, 0,  # Root delay, root dispersion
+            struct.unpack("!I", b"FAKE")[0],  # Reference ID
+            *to_ntp_timestamp(transmit_time),  # Reference timestamp
+            *originate,
+            *to_ntp_timestamp(receive_time),
+            *to_ntp_timestamp(transmit_time),
+        )
+
+    def serve_forever(self):
+        self.running = True
+        while self.running:
+            try:
+                request, client = self.sock.recvfrom(1024)
+            except OSError:
+                break
+            receive_time = self.now()
+            if len(request) < NTP_PACKET.size:
+                continue
+            if self.delay:
+                time.sleep(self.delay)
+            self.sock.sendto(self.build_reply(request, receive_time), client)
+            self.requests += 1
+
+    # Function to run the server in a background thread
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True, name="fake-ntp")
+        thread.start()
+        return thread
+
+    def stop(self):
+        self.running = False
+        self.sock.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Local NTP responder for offline testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1123)
+    parser.add_argument("--offset", type=float, default=0.0, help="seconds added to the system time")
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait before replying")
+    args = parser.parse_args()
+    server = FakeNtpServer(args.host, args.port, args.offset, args.delay)
+    print(f"Fake NTP server listening on {server.address[0]}:{server.address[1]} (offset {args.offset:+} s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#frame_pipeline.py
+# Frame processing shared by the kiosk UI, headless runs and the benchmarks:
+# face analysis on the face camera feed, conversion for display and building
+# the saved record image. Nothing here touches Tk or the hardware.
+import os
+
+import cv2
+from PIL import Image
+
+import stage_timing  # Hot-path timing histograms
+
+# Font settings for the text drawn on frames
+FEEDBACK_FONT = cv2.FONT_HERSHEY_SIMPLEX
+FEEDBACK_COLOR = (0, 0, 255)
+FACE_BOX_COLOR = (0, 255, 0)
+
+# Function to detect the face in a frame and judge whether it is good enough to capture.
+# Returns (faces, feedback_text); faces is empty when the detector is not loaded yet.
+def analyze_face(gray_frame, face_cascade):
+    if face_cascade is not None:
+        faces = face_cascade.detectMultiScale(gray_frame, scaleFactor=1.1, minNeighbors=5, minSize=(100, 100))
+    else:
+        faces = ()  # Face detector still loading
+
+    if len(faces) == 0:
+        return faces, "No face detected. Adjust position or lighting."
+
+    # Assume the first detected face is the target
+    (x, y, w, h) = faces[0]
+
+    # Check lighting conditions (average brightness of the face region)
+    face_region = gray_frame[y:y+h, x:x+w]
+    avg_brightness = cv2.mean(face_region)[0]
+
+    # Basic face quality checks
+    if w < 100 or h < 100:
+        return faces, "Face is too small. Move closer."
+    if avg_brightness < 50:
+        return faces, "Lighting is too low."
+    return faces, "Face detected. Ready to capture."
+
+# Function to resize the face camera frame for display and draw the face box and feedback on it
+def annotate_face_frame(frame, size, face_cascade):
+    frame_resized = cv2.resize(frame, size)
+    gray_frame = cv2.cvtColor(frame_resized, cv2.COLOR_BGR2GRAY)  # Convert to grayscale for detection
+    faces, feedback_text = analyze_face(gray_frame, face_cascade)
+    if len(faces) > 0:
+        # Draw a rectangle around the face
+        (x, y, w, h) = faces[0]
+        cv2.rectangle(frame_resized, (x, y), (x+w, y+h), FACE_BOX_COLOR, 2)
+    # Display feedback
+    cv2.putText(frame_resized, feedback_text, (10, 30), FEEDBACK_FONT, 0.7, FEEDBACK_COLOR, 2)
+    return frame_resized
+
+# Remembers which frame each camera panel shows, so a display tick only
+# analyzes and renders a camera that has delivered a new frame since
+class PanelFrames:
+    def __init__(self):
+        self.shown = {}  # role -> frame sequence number (or camera state) shown in its panel
+
+    # Function to check whether a panel already shows this frame, and remember it if not.
+    # Without a frame the panel shows camera_state, once, and again when the state changes.
+    def is_current(self, role, frame, seq, camera_state=None):
+        shown = seq if frame is not None else camera_state
+        if self.shown.get(role) == shown:
+            stage_timing.count(f"display.{role}.unchanged")
+            return True
+        self.shown[role] = shown
+        return False
+
+    def clear(self):
+        self.shown.clear()
+
+# Function to convert a BGR frame to a PIL image for display
+def to_display_image(frame, size=None):
+    if size is not None:
+        frame = cv2.resize(frame, size)
+    return Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+# Function to stack both camera frames into the saved record image with its caption
+def build_record_image(frame1, frame2, timestamp, weight, device_id, pic_number):
+    if frame1.shape[1] != frame2.shape[1]:
+        # vconcat needs equal widths; scale the plate frame to the face frame
+        height = frame2.shape[0] * frame1.shape[1] // frame2.shape[1]
+        frame2 = cv2.resize(frame2, (frame1.shape[1], height))
+    combined_image = cv2.vconcat([frame1, frame2])
+    cv2.putText(combined_image, f"{timestamp} Weight: {weight}, {device_id}, {pic_number}",
+                (10, combined_image.shape[0] - 10),
+                FEEDBACK_FONT, 0.7, (255, 255, 255), 2)
+    return combined_image
+
+# Function to write a record image to the save folder; returns the full path
+def save_record_image(image, save_path, filename):
+    # Ensure the save path exists
+    if not os.path.exists(save_path):
+        os.makedirs(save_path)
+    full_path = os.path.join(save_path, filename)
+    if not cv2.imwrite(full_path, image):
+        raise OSError(f"Could not write {full_path}")
+    return full_path
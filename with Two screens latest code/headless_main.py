@@ -0,0 +1,109 @@
+#headless_main.py
+# Runs the kiosk without a screen: the same device checks, camera capture,
+# weighing scale, RTC, button and image saving as TestMain.py, with status
+# printed to the console instead of drawn with Tk. For units without a
+# display, and for running the pipeline on a server against recorded inputs.
+#
+# Usage on a device:
+#     python headless_main.py
+# Without hardware (recorded cameras and scale, simulated RTC, a save every 10 s):
+#     python headless_main.py --face mjpeg:face.mjpeg --plate mjpeg:plate.mjpeg \
+#         --trace scale.trace --clock simulated --no-button --save-interval 10 --duration 60
+import argparse
+import threading
+import time
+
+# Custom Modules
+import rtc_handler_manual as rtc_handler  # Import the manual RTC handler
+import uart_handler  # Import the UART handler
+import camera_handler  # Camera opening and backoff-based reconnection
+import clock_backends  # RTC chip, simulated and system clock backends
+import app_config  # Device configuration file
+import kiosk_core  # Cameras, scale, RTC, button and saving, shared with TestMain.py
+
+STATUS_INTERVAL = 10  # Seconds between status lines
+
+# Function to turn a --face/--plate value into a camera identifier: a device
+# index is a number, like cameras.*.device in the config file
+def camera_identifier(value):
+    return int(value) if value.isdigit() else value
+
+# Function to print one status line: time, weight and camera states
+def print_status():
+    rtc_time = rtc_handler.get_rtc_time()
+    cameras = ", ".join(f"{capture.role} {camera_handler.get_camera_state(capture.role)}"
+                        for capture in (kiosk_core.face_capture, kiosk_core.plate_capture))
+    print(f"{rtc_time['date']} {rtc_time['time']}  Food Weight: {uart_handler.weight}  Cameras: {cameras}")
+
+# Function to save an image every interval seconds, in place of button presses
+def save_periodically(interval, stop_event):
+    while not stop_event.wait(interval):
+        kiosk_core.capture_and_save_image()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Midday Meal kiosk without a display")
+    parser.add_argument("--config", help="config file (default: $MIDDAYMEAL_CONFIG or the standard locations)")
+    parser.add_argument("--device", help="apply this device's overrides from the config file (default: host name)")
+    parser.add_argument("--face", help="face camera: device, by-id:/by-path: name or recorded source")
+    parser.add_argument("--plate", help="plate camera: device, by-id:/by-path: name or recorded source")
+    parser.add_argument("--trace", help="replay a recorded scale trace instead of the serial port")
+    parser.add_argument("--clock", choices=list(clock_backends.CLOCK_BACKENDS), help="RTC backend")
+    parser.add_argument("--save-path", help="folder for saved images (default: storage.save_path)")
+    parser.add_argument("--no-button", action="store_true", help="run without the GPIO button (default: button.enabled)")
+    parser.add_argument("--save-interval", type=float, help="save an image every N seconds")
+    parser.add_argument("--duration", type=float, help="stop after N seconds (default: run until Ctrl+C)")
+    parser.add_argument("--face-detector", action="store_true",
+                        help="also load the face detector (it only drives the on-screen feedback)")
+    args = parser.parse_args()
+
+    # The config file first, then the command line options on top of it
+    try:
+        app_config.load_and_apply(args.config, args.device)
+    except app_config.ConfigError as e:
+        print(f"Configuration error: {e}")
+        return 2
+    if args.face:
+        camera_handler.CAMERA_ROLES["face"] = camera_identifier(args.face)
+    if args.plate:
+        camera_handler.CAMERA_ROLES["plate"] = camera_identifier(args.plate)
+    if args.trace:
+        kiosk_core.uart_options["replay_file"] = args.trace
+    if args.clock:
+        rtc_handler.set_clock_backend(args.clock)
+    if args.save_path:
+        kiosk_core.SAVE_PATH = args.save_path
+    if args.no_button:
+        kiosk_core.BUTTON_ENABLED = False
+
+    probes = [probe for probe in kiosk_core.INIT_PROBES
+              if not (probe[0] == "Button" and not kiosk_core.BUTTON_ENABLED)
+              and not (probe[0] == "Face detector" and not args.face_detector)]
+
+    kiosk_core.start_services(load_detector=args.face_detector)
+    print("Welcome to the Mid Day Meal Scheme!\nSetting up modules...")
+    results = kiosk_core.run_init_probes(lambda *result: print(kiosk_core.format_probe_result(*result)), probes)
+    if not kiosk_core.required_probes_ok(results, probes):
+        print("Initialization failed. Please check the setup.")
+        kiosk_core.shutdown()
+        return 1
+
+    kiosk_core.start_camera_threads(use_button=kiosk_core.BUTTON_ENABLED)
+    stop_event = threading.Event()
+    if args.save_interval:
+        threading.Thread(target=save_periodically, args=(args.save_interval, stop_event), daemon=True).start()
+
+    end_time = time.monotonic() + args.duration if args.duration else None
+    try:
+        while end_time is None or time.monotonic() < end_time:
+            wait = STATUS_INTERVAL if end_time is None else min(STATUS_INTERVAL, end_time - time.monotonic())
+            if stop_event.wait(max(wait, 0)):
+                break
+            print_status()
+    except KeyboardInterrupt:
+        pass
+    stop_event.set()
+    kiosk_core.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,318 @@
+#kiosk_core.py
+# Everything the kiosk does apart from drawing the screen: the camera capture
+# loops, weighing scale, RTC, button, device checks at startup and saving the
+# record images. Shared by the Tk app (TestMain.py) and the headless runner
+# (headless_main.py), so neither imports the other and this module never
+# imports tkinter.
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+
+import cv2
+
+import rtc_handler_manual as rtc_handler  # Import the manual RTC handler
+import uart_handler  # Import the UART handler
+import ntp_sync  # Drift-aware RTC sync with NTP
+import camera_handler  # Camera opening and backoff-based reconnection
+import frame_pipeline  # Face analysis and record image building
+import stage_timing  # Hot-path timing histograms
+import metrics_server  # Prometheus metrics endpoint for fleet monitoring
+import sampling_profiler  # On-demand flame graph profiles
+
+# OpenCV's Haar Cascade for face detection, loaded in the background at startup
+face_cascade = None
+face_cascade_ready = threading.Event()
+
+capture_lock = threading.Lock()  # Lock for capture process
+pause_event = threading.Event()  # Event to pause and resume operations
+
+# Folder where the combined record images are saved
+SAVE_PATH = "/home/middaymealtest/my_project/data"
+DEVICE_ID = "DeviceID"  # Replace with actual Device ID
+# Folder where timing stats are dumped (F10 or `kill -USR1 <pid>`)
+STATS_PATH = "/home/middaymealtest/my_project/stats"
+# Seconds the sampling profiler runs for (F11 or `kill -USR2 <pid>`); profiles go to STATS_PATH
+PROFILE_DURATION = 30
+
+# Capture loops for both cameras; frames are only decoded when the display or a save asks for one
+face_capture = camera_handler.CameraCapture("face", pause_event)  # Face camera (USB webcam)
+plate_capture = camera_handler.CameraCapture("plate", pause_event)  # Plate camera (second USB camera)
+
+# Options passed to uart_handler.setup_uart(), e.g. a replay_file for runs without a scale
+uart_options = {}
+
+# GPIO library for button handling, imported and set up by setup_gpio()
+GPIO = None
+BUTTON_ENABLED = True  # False on units built without the button
+BUTTON_PIN = 17  # GPIO pin number for the button
+
+# Debounce and press duration constants
+PRESS_DURATION_THRESHOLD = 0.15  # 150 ms in seconds
+pic_number = 1  # Initialize globally for unique image naming
+button_pressed_time = 0
+
+# Function to set up the button GPIO pin
+def setup_gpio():
+    global GPIO
+    import RPi.GPIO  # Only available on the Pi, so imported when the hardware is set up
+    GPIO = RPi.GPIO
+    GPIO.setmode(GPIO.BCM)
+    GPIO.setup(BUTTON_PIN, GPIO.IN, pull_up_down=GPIO.PUD_UP)  # Use pull-up resistor
+
+# Function to load the face detection model
+def load_face_cascade():
+    global face_cascade
+    try:
+        cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        if cascade.empty():
+            print("Error loading face detector: cascade file is missing or invalid")
+        else:
+            face_cascade = cascade
+    except Exception as e:
+        print(f"Error loading face detector: {e}")
+    face_cascade_ready.set()
+
+# Function to capture images from both cameras and save to SD card.
+# show_progress, if given, is called before saving and returns a function that
+# is called when the save is done (the Tk app uses it for its pop-up).
+# Returns the path of the saved image, or None if a camera had no frame.
+def capture_and_save_image(show_progress=None):
+    global pic_number
+    # Grab freshly decoded frames rather than the last displayed ones, before the capture loops pause
+    frame1 = face_capture.get_frame(fresh=True)
+    frame2 = plate_capture.get_frame(fresh=True)
+    weight = uart_handler.weight
+    full_path = None
+
+    # Pause operations
+    pause_event.clear()
+    try:
+        with capture_lock, stage_timing.timed("save.total"):
+            hide_progress = show_progress() if show_progress else None
+
+            # Use the drift-corrected RTC time so records match the time shown on screen
+            capture_time = rtc_handler.get_rtc_datetime() or datetime.now()
+            timestamp = capture_time.strftime("%Y%m%d_%H%M%S")
+            filename = f"{DEVICE_ID}_{timestamp}_{pic_number}.jpg"
+
+            # Combine frames into one image
+            if frame1 is not None and frame2 is not None:
+                with stage_timing.timed("save.build"):
+                    combined_image = frame_pipeline.build_record_image(frame1, frame2, timestamp, weight, DEVICE_ID, pic_number)
+
+                # Save the combined image
+                with stage_timing.timed("save.write"):
+                    full_path = frame_pipeline.save_record_image(combined_image, SAVE_PATH, filename)
+                stage_timing.count("save.images")
+                print(f"Image saved at {full_path}")
+
+                # Increment picture number
+                pic_number += 1
+            else:
+                print("Image not saved: a camera has no frame")
+
+            if hide_progress:
+                hide_progress()
+    finally:
+        # Resume operations
+        pause_event.set()
+    return full_path
+
+# Button polling function; on_press is called (on this thread) for each press
+def poll_button(on_press=capture_and_save_image):
+    global button_pressed_time
+    while True:
+        if GPIO.input(BUTTON_PIN) == GPIO.LOW:  # Button is pressed
+            current_time = time.time()
+            if current_time - button_pressed_time > PRESS_DURATION_THRESHOLD:
+                button_pressed_time = current_time
+                on_press()
+        time.sleep(0.1)  # Small delay to avoid rapid polling
+
+# Function to write the timing stats to a file (hidden F10 key or SIGUSR1)
+def dump_stats(*args):
+    try:
+        os.makedirs(STATS_PATH, exist_ok=True)
+        path = os.path.join(STATS_PATH, f"stage_stats_{time.strftime('%Y%m%d_%H%M%S')}.json")
+        stage_timing.dump_stats(path)
+        print(f"Timing stats written to {path}")
+    except Exception as e:
+        print(f"Error writing timing stats: {e}")
+
+# Function to start or stop the sampling profiler (hidden F11 key or SIGUSR2)
+def toggle_profiler(*args):
+    try:
+        sampling_profiler.toggle_profiler(STATS_PATH, PROFILE_DURATION)
+    except Exception as e:
+        print(f"Error starting profiler: {e}")
+
+# Device checks run at startup. Each returns a truthy value when the device is ready.
+def probe_button():
+    setup_gpio()
+    return True
+
+def probe_rtc():
+    if rtc_handler.refresh_rtc_time():
+        return True
+    ntp_sync.request_sync()  # A chip that lost its time is set from NTP, then passes the next check
+    return False
+
+def probe_uart():
+    uart_handler.setup_uart(**uart_options)
+    return uart_handler.ser is not None and uart_handler.ser.is_open
+
+def probe_face_detector():
+    face_cascade_ready.wait()  # Loading since startup, see start_services()
+    return face_cascade is not None
+
+# (status name, check, timeout in seconds, required to start)
+# The UART is not required: the reading loop reopens the port by itself.
+# The RTC is: saved records are named and stamped with its time, and a chip
+# that cannot be read would file them all under the fallback date.
+INIT_PROBES = [
+    ("Button", probe_button, 2, True),
+    ("RTC", probe_rtc, 2, True),
+    ("UART", probe_uart, 3, False),
+    ("Camera 1", lambda: camera_handler.open_camera("face"), 8, True),
+    ("Camera 2", lambda: camera_handler.open_camera("plate"), 8, True),
+    ("Face detector", probe_face_detector, 20, False),
+]
+
+# Retry schedule for a required device check that failed (retries forever by default)
+INIT_RETRY_POLICY = camera_handler.ReconnectPolicy(initial_delay=2.0, max_delay=30.0, max_attempts=None)
+
+# Function to run all device checks concurrently.
+# on_result(name, result, error) is called as soon as each check finishes or
+# times out, so startup takes as long as the slowest device, not the sum.
+# A failed required check is run again on the retry policy's schedule, so a
+# device plugged in late still lets the kiosk start. Checks that are not
+# required are not waited for once every required check has passed.
+# Returns {name: result}, with None for failed, timed-out or unfinished checks.
+def run_init_probes(on_result, probes=INIT_PROBES, policy=INIT_RETRY_POLICY):
+    executor = ThreadPoolExecutor(max_workers=len(probes), thread_name_prefix="init-probe")
+    checks = {name: (check, timeout) for name, check, timeout, _ in probes}
+    required = {name for name, _, _, is_required in probes if is_required}
+    pending = {}  # future: (name, deadline)
+    retries = {}  # name: time of the next attempt
+    attempts = {}
+    results = {}
+
+    def submit(name):
+        check, timeout = checks[name]
+        pending[executor.submit(check)] = (name, time.monotonic() + timeout)
+
+    def finish(name, result, error):
+        results[name] = result
+        if result is None and name in required:
+            attempts[name] = attempts.get(name, 0) + 1
+            if policy.max_attempts is None or attempts[name] < policy.max_attempts:
+                delay = policy.delay(attempts[name])
+                retries[name] = time.monotonic() + delay
+                error = f"{error or 'not ready'}, retrying in {delay:.0f} s"
+        on_result(name, result, error)
+
+    for name in checks:
+        submit(name)
+    while pending or retries:
+        if required and all(results.get(name) for name in required):
+            break  # Only checks that are not required are left
+        next_time = min([deadline for _, deadline in pending.values()] + list(retries.values()))
+        timeout = max(next_time - time.monotonic(), 0)
+        if pending:
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        else:
+            time.sleep(timeout)
+            done = ()
+        for future in done:
+            name, _ = pending.pop(future)
+            try:
+                finish(name, future.result() or None, None)
+            except Exception as e:
+                finish(name, None, str(e))
+        for future, (name, deadline) in list(pending.items()):
+            if time.monotonic() >= deadline:
+                del pending[future]
+                # A late camera would be opened behind the capture threads' back, release it
+                future.add_done_callback(release_late_capture)
+                finish(name, None, f"no response after {checks[name][1]} s")
+        for name, retry_time in list(retries.items()):
+            if time.monotonic() >= retry_time:
+                del retries[name]
+                submit(name)
+    for future, (name, _) in pending.items():
+        results[name] = None
+        future.add_done_callback(release_late_capture)
+    executor.shutdown(wait=False)
+
+    face_capture.cap = results.get("Camera 1")
+    plate_capture.cap = results.get("Camera 2")
+    return results
+
+# Function to format one device check result as a status line
+def format_probe_result(name, result, error):
+    if result:
+        return f"{name}: OK"
+    elif error:
+        return f"{name} Error: {error}"
+    return f"{name}: Error"
+
+# Function to release a camera whose check finished after it had timed out
+def release_late_capture(future):
+    if future.exception() is None and hasattr(future.result(), "release"):
+        future.result().release()
+
+# Function to tell whether every required check in probes passed
+def required_probes_ok(results, probes=INIT_PROBES):
+    return all(results.get(name) for name, _, _, required in probes if required)
+
+# Function to start what runs from power-on, before the devices are checked:
+# loading the face detector, the NTP sync, the metrics endpoint and the
+# diagnostics signals (`kill -USR1` dumps timing stats, `kill -USR2` profiles)
+def start_services(load_detector=True):
+    if load_detector:
+        threading.Thread(target=load_face_cascade, daemon=True).start()
+    else:
+        face_cascade_ready.set()
+
+    # Signal handlers can only be installed from the main thread
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGUSR1, dump_stats)
+        signal.signal(signal.SIGUSR2, toggle_profiler)
+
+    ntp_sync.start_sync_thread()  # Keep the RTC in step with NTP in the background
+
+    # Serve internal stats for the fleet monitoring
+    metrics_server.register_capture(face_capture)
+    metrics_server.register_capture(plate_capture)
+    metrics_server.register_gauge("save_in_progress", "Whether an image is being saved (saves run one at a time)",
+                                  lambda: int(capture_lock.locked()))
+    metrics_server.set_disk_path(os.path.dirname(SAVE_PATH))
+    metrics_server.start_metrics_server()
+
+# Function to start camera threads
+def start_camera_threads(on_button_press=capture_and_save_image, use_button=True):
+    # Let the display, capture and UART loops run
+    pause_event.set()
+    uart_handler.pause_event.set()
+
+    # Start threads to capture frames from both cameras
+    face_capture.start()
+    plate_capture.start()
+
+    # Start thread to read weight from UART
+    threading.Thread(target=uart_handler.read_weight_from_uart, daemon=True).start()
+
+    # Start the button polling in a separate thread
+    if use_button:
+        threading.Thread(target=poll_button, args=(on_button_press,), daemon=True).start()
+
+# Function to release the cameras and GPIO on exit
+def shutdown():
+    face_capture.release()
+    plate_capture.release()
+
+    if GPIO:
+        GPIO.cleanup()  # Clean up GPIO settings
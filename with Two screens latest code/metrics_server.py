@@ -0,0 +1,180 @@
+#metrics_server.py
+# Prometheus text-format metrics for fleet monitoring, served over HTTP from a
+# background thread. Values are read from the other modules only when the
+# endpoint is scraped, so the Tk loop and the capture threads do no extra work.
+#
+#     curl http://127.0.0.1:9101/metrics
+#
+# The server listens on localhost by default; set METRICS_HOST to "0.0.0.0"
+# for a Prometheus server on the network to scrape the kiosk directly.
+import shutil
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import camera_handler
+import ntp_sync
+import rtc_handler_manual as rtc_handler
+import scale_drivers
+import stage_timing
+import uart_handler
+
+METRICS_ENABLED = True
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9101
+METRIC_PREFIX = "middaymeal_"
+
+# Camera captures to report on, added with register_capture()
+captures = []
+# Extra gauges registered by the app: name -> (help text, function returning a number)
+gauges = {}
+# Folder whose free space is reported
+disk_path = "/"
+start_time = time.monotonic()
+
+# Function to report a camera capture loop's frame counters
+def register_capture(capture):
+    captures.append(capture)
+
+# Function to add a gauge read by calling value_function at scrape time
+def register_gauge(name, help_text, value_function):
+    gauges[name] = (help_text, value_function)
+
+# Function to set the folder whose free disk space is reported
+def set_disk_path(path):
+    global disk_path
+    disk_path = path
+
+# Function to escape a label value for the text format
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+# Function to format one sample line
+def sample(name, value, labels=None):
+    if labels:
+        label_text = ",".join(f'{key}="{escape_label(val)}"' for key, val in labels.items())
+        return f"{METRIC_PREFIX}{name}{{{label_text}}} {value}"
+    return f"{METRIC_PREFIX}{name} {value}"
+
+# Function to add a metric's HELP/TYPE header and samples to lines
+def add_metric(lines, name, metric_type, help_text, samples):
+    lines.append(f"# HELP {METRIC_PREFIX}{name} {help_text}")
+    lines.append(f"# TYPE {METRIC_PREFIX}{name} {metric_type}")
+    for labels, value in samples:
+        lines.append(sample(name, value, labels))
+
+# Function to add camera states and frame counters
+def collect_cameras(lines):
+    states = []
+    for role in camera_handler.CAMERA_ROLES:
+        state = camera_handler.get_camera_state(role)
+        states.append(({"role": role, "state": state}, 1))
+    add_metric(lines, "camera_state", "gauge", "Camera state (1 for the current state)", states)
+
+    now = time.monotonic()
+    add_metric(lines, "camera_frames_grabbed_total", "counter", "Frames grabbed from the camera",
+               [({"role": c.role}, c.frames_grabbed) for c in captures])
+    add_metric(lines, "camera_frames_decoded_total", "counter", "Frames decoded for display or saving",
+               [({"role": c.role}, c.frames_decoded) for c in captures])
+    add_metric(lines, "camera_frames_dropped_total", "counter", "Camera frames the capture loop was too late to grab",
+               [({"role": c.role}, c.frames_dropped) for c in captures])
+    add_metric(lines, "camera_frame_age_seconds", "gauge", "Age of the latest decoded frame",
+               [({"role": c.role}, round(now - c.frame_time, 3)) for c in captures if c.frame_time is not None])
+
+# Function to add the stage timing histograms and event counters
+def collect_stages(lines):
+    stats = stage_timing.snapshot()
+    bounds = [str(bound) for bound in stage_timing.BUCKET_BOUNDS] + ["+Inf"]
+    lines.append(f"# HELP {METRIC_PREFIX}stage_seconds Duration of each instrumented stage")
+    lines.append(f"# TYPE {METRIC_PREFIX}stage_seconds histogram")
+    for name, stage in stats["stages"].items():
+        cumulative = 0
+        for bound, bucket_count in zip(bounds, stage["buckets"]):
+            cumulative += bucket_count
+            lines.append(sample("stage_seconds_bucket", cumulative, {"stage": name, "le": bound}))
+        lines.append(sample("stage_seconds_sum", round(stage["sum_s"], 6), {"stage": name}))
+        lines.append(sample("stage_seconds_count", stage["count"], {"stage": name}))
+    add_metric(lines, "events_total", "counter", "Counted events (UART readings, saves, camera losses, ...)",
+               [({"event": name}, value) for name, value in stats["counters"].items()])
+
+# Function to add the weighing scale connection and reading
+def collect_uart(lines):
+    connected = uart_handler.ser is not None and uart_handler.ser.is_open
+    add_metric(lines, "uart_connected", "gauge", "Whether the weighing scale port is open", [(None, int(connected))])
+    reading = scale_drivers.parse_weight(uart_handler.weight)
+    if reading is not None:  # None until the scale has sent a reading ("Non")
+        value, unit = reading
+        add_metric(lines, "scale_weight", "gauge", "Latest weight reported by the scale, in the scale's unit",
+                   [({"unit": unit}, value)])
+
+# Function to add the RTC offset and drift from the NTP sync
+def collect_clock(lines):
+    engine = ntp_sync.sync_engine
+    if engine.last_offset is not None:
+        add_metric(lines, "rtc_offset_seconds", "gauge", "RTC offset from NTP at the last sync",
+                   [(None, round(engine.last_offset, 6))])
+    add_metric(lines, "rtc_drift_ppm", "gauge", "Estimated RTC drift", [(None, round(engine.drift_ppm, 3))])
+    add_metric(lines, "rtc_writes_total", "counter", "Times the RTC was set from NTP", [(None, engine.rtc_writes)])
+    correction = rtc_handler.rtc_correction
+    if correction is not None:
+        add_metric(lines, "rtc_correction_seconds", "gauge", "Correction applied to the RTC time",
+                   [(None, round(correction[1], 6))])
+
+# Function to add disk space, uptime and the app's own gauges
+def collect_system(lines):
+    try:
+        usage = shutil.disk_usage(disk_path)
+        add_metric(lines, "disk_free_bytes", "gauge", "Free space on the image storage",
+                   [({"path": disk_path}, usage.free)])
+        add_metric(lines, "disk_size_bytes", "gauge", "Size of the image storage", [({"path": disk_path}, usage.total)])
+    except OSError:
+        pass
+    add_metric(lines, "uptime_seconds", "gauge", "Seconds since the app started",
+               [(None, round(time.monotonic() - start_time, 1))])
+    for name, (help_text, value_function) in gauges.items():
+        try:
+            add_metric(lines, name, "gauge", help_text, [(None, value_function())])
+        except Exception as e:
+            print(f"Error reading metric {name}: {e}")
+
+# Function to build the full metrics page
+def collect_metrics():
+    lines = []
+    for collector in (collect_cameras, collect_stages, collect_uart, collect_clock, collect_system):
+        try:
+            collector(lines)
+        except Exception as e:
+            print(f"Error collecting metrics: {e}")
+    return "\n".join(lines) + "\n"
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = collect_metrics().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Don't print a line for every scrape
+
+# Function to start the metrics endpoint in a daemon thread; returns the server or None.
+# host and port default to METRICS_HOST and METRICS_PORT.
+def start_metrics_server(host=None, port=None):
+    if not METRICS_ENABLED:
+        return None
+    host = METRICS_HOST if host is None else host
+    port = METRICS_PORT if port is None else port
+    try:
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+    except OSError as e:
+        print(f"Error starting metrics server on {host}:{port}: {e}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics").start()
+    print(f"Metrics available at http://{host}:{server.server_address[1]}/metrics")
+    return server
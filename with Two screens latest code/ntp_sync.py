@@ -0,0 +1,197 @@
+#ntp_sync.py
+# Keeps the PCF8523 RTC in step with NTP without rewriting it on every cycle.
+#
+# Each sync measures the RTC offset against an NTP sample (taking the round-trip
+# delay into account), fits a drift rate over the samples taken since the chip
+# was last written, and hands that correction to rtc_handler_manual so the
+# displayed and recorded time stays right between syncs. The chip itself is only
+# rewritten when its raw offset grows past RTC_WRITE_THRESHOLD.
+import random
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError  # Not the builtin TimeoutError before Python 3.11
+from datetime import datetime, timedelta
+
+import ntplib  # NTP client for time sync
+
+import rtc_handler_manual as rtc_handler
+
+# Local time zone of the devices (IST, UTC +5:30)
+LOCAL_UTC_OFFSET = timedelta(hours=5, minutes=30)
+# Rewrite the chip once its raw offset exceeds this many seconds
+RTC_WRITE_THRESHOLD = 1.0
+# Ignore NTP samples whose round trip took longer than this (seconds)
+MAX_SAMPLE_DELAY = 0.5
+# Samples closer together than this (seconds) are too short a baseline for a drift fit
+MIN_DRIFT_BASELINE = 3600
+# Crystal drift beyond this (ppm) means a bad sample, not a real RTC
+MAX_DRIFT_PPM = 200
+# Number of offset samples kept for the drift fit
+DRIFT_SAMPLE_COUNT = 16
+# Sync interval bounds (seconds); the interval doubles while the RTC holds its time
+MIN_SYNC_INTERVAL = 600
+MAX_SYNC_INTERVAL = 4 * 3600
+
+# Servers queried in parallel on every sync; the sample with the lowest delay wins
+NTP_SERVERS = ['0.pool.ntp.org', '1.pool.ntp.org', '2.pool.ntp.org', 'time.google.com']
+# Per-server request timeout (seconds)
+NTP_TIMEOUT = 5
+# Retry interval bounds (seconds) while no server is reachable; doubles per failed attempt
+OFFLINE_RETRY_MIN = 60
+OFFLINE_RETRY_MAX = 6 * 3600
+
+# Event to manage pause/resume
+pause_event = threading.Event()
+# Set by request_sync() to wake the sync thread early
+sync_now_event = threading.Event()
+
+# Function to get a time sample from an NTP server ("host" or "host:port",
+# e.g. the local fake_ntp_server.py).
+# Returns (local datetime, time.monotonic() it refers to, round-trip delay) or None.
+def get_ntp_sample(ntp_server='pool.ntp.org', timeout=NTP_TIMEOUT):
+    host, _, port = ntp_server.partition(':')
+    try:
+        client = ntplib.NTPClient()
+        response = client.request(host, version=3, port=int(port) if port else 'ntp', timeout=timeout)
+    except Exception:
+        return None
+    # response.offset is corrected for the network delay, so system time plus
+    # offset is the true time at this instant
+    sample_monotonic = time.monotonic()
+    true_time = datetime.utcfromtimestamp(time.time() + response.offset) + LOCAL_UTC_OFFSET
+    return true_time, sample_monotonic, response.delay
+
+# Function to query several NTP servers in parallel and return the sample with
+# the lowest round-trip delay (the most accurate one), or None if all failed
+def get_best_ntp_sample(servers=NTP_SERVERS, timeout=NTP_TIMEOUT):
+    best = None
+    if not servers:
+        return None
+    executor = ThreadPoolExecutor(max_workers=len(servers), thread_name_prefix="ntp-query")
+    futures = [executor.submit(get_ntp_sample, server, timeout) for server in servers]
+    try:
+        # DNS lookups are not covered by the NTP timeout, so bound the whole round too
+        for future in as_completed(futures, timeout=timeout * 2):
+            sample = future.result()
+            if sample is not None and (best is None or sample[2] < best[2]):
+                best = sample
+    except FuturesTimeoutError:
+        pass
+    executor.shutdown(wait=False, cancel_futures=True)
+    return best
+
+# Function to get the server time using NTP, adjusted for IST (UTC +5:30)
+def get_ntp_time(servers=NTP_SERVERS):
+    sample = get_best_ntp_sample(servers)
+    if sample is None:
+        return None
+    true_time, sample_monotonic, _ = sample
+    return true_time + timedelta(seconds=time.monotonic() - sample_monotonic)
+
+# Tracks the RTC offset and drift across syncs and decides when to write the chip
+class RtcSyncEngine:
+    def __init__(self, write_threshold=RTC_WRITE_THRESHOLD):
+        self.write_threshold = write_threshold
+        self.samples = deque(maxlen=DRIFT_SAMPLE_COUNT)  # (monotonic, raw offset) since the last write
+        self.drift_ppm = 0.0
+        self.interval = MIN_SYNC_INTERVAL
+        self.last_offset = None
+        self.rtc_writes = 0
+
+    # Least-squares slope of offset over time, in ppm
+    def _fit_drift(self):
+        if len(self.samples) < 2 or self.samples[-1][0] - self.samples[0][0] < MIN_DRIFT_BASELINE:
+            return None
+        mean_t = sum(t for t, _ in self.samples) / len(self.samples)
+        mean_offset = sum(offset for _, offset in self.samples) / len(self.samples)
+        variance = sum((t - mean_t) ** 2 for t, _ in self.samples)
+        covariance = sum((t - mean_t) * (offset - mean_offset) for t, offset in self.samples)
+        drift_ppm = covariance / variance * 1e6
+        if abs(drift_ppm) > MAX_DRIFT_PPM:
+            print(f"Ignoring implausible RTC drift estimate of {drift_ppm:.1f} ppm")
+            return None
+        return drift_ppm
+
+    # Write the true time to the chip exactly on a second boundary
+    def _write_rtc(self, true_time, sample_monotonic):
+        now = true_time + timedelta(seconds=time.monotonic() - sample_monotonic)
+        next_second = now.replace(microsecond=0) + timedelta(seconds=1)
+        time.sleep((next_second - now).total_seconds())
+        rtc_handler.set_rtc_datetime(next_second)
+        self.samples.clear()
+        self.rtc_writes += 1
+
+    # Process one NTP sample; returns the number of seconds until the next sync
+    def process(self, sample):
+        true_time, sample_monotonic, delay = sample
+        if delay > MAX_SAMPLE_DELAY:
+            print(f"NTP round trip of {delay:.3f} s is too slow to measure the RTC, skipping.")
+            return self.interval
+
+        rtc_time, rtc_monotonic = rtc_handler.read_rtc_second_edge()
+        if rtc_time is None:
+            # Nothing to measure, e.g. a chip holding no valid time after losing
+            # power; writing the time is what makes it readable again
+            print("RTC could not be read, setting it from NTP.")
+            self._write_rtc(true_time, sample_monotonic)
+            rtc_handler.set_rtc_correction(time.monotonic(), 0.0, self.drift_ppm)
+            self.interval = MIN_SYNC_INTERVAL
+            return self.interval
+        true_at_rtc = true_time + timedelta(seconds=rtc_monotonic - sample_monotonic)
+        offset = (rtc_time - true_at_rtc).total_seconds()
+        self.last_offset = offset
+        self.samples.append((rtc_monotonic, offset))
+
+        drift_ppm = self._fit_drift()
+        if drift_ppm is not None:
+            self.drift_ppm = drift_ppm
+
+        if abs(offset) > self.write_threshold:
+            print(f"RTC is off by {offset:+.3f} s (drift {self.drift_ppm:+.1f} ppm), updating it from NTP.")
+            self._write_rtc(true_time, sample_monotonic)
+            rtc_handler.set_rtc_correction(time.monotonic(), 0.0, self.drift_ppm)
+            self.interval = MIN_SYNC_INTERVAL
+        else:
+            # Leave the chip alone and correct the time we serve instead
+            print(f"RTC offset {offset:+.3f} s (drift {self.drift_ppm:+.1f} ppm), within threshold.")
+            rtc_handler.set_rtc_correction(rtc_monotonic, offset, self.drift_ppm)
+            self.interval = min(self.interval * 2, MAX_SYNC_INTERVAL)
+        return self.interval
+
+sync_engine = RtcSyncEngine()
+
+# Function to sync RTC with NTP server time (Adjusted for IST).
+# Runs forever in its own thread; while offline it backs off exponentially
+# (with jitter) so a school without network for days costs next to nothing.
+def sync_rtc_with_ntp(servers=NTP_SERVERS):
+    offline_retry = OFFLINE_RETRY_MIN
+    while True:
+        pause_event.wait()  # Wait here if operations are paused
+        sample = get_best_ntp_sample(servers)
+        if sample:
+            try:
+                interval = sync_engine.process(sample)
+            except Exception as e:
+                # e.g. an I2C error while reading or writing the chip; try again next interval
+                print(f"Error syncing RTC with NTP: {e}")
+                interval = sync_engine.interval
+            offline_retry = OFFLINE_RETRY_MIN
+        else:
+            interval = offline_retry * random.uniform(0.8, 1.2)
+            print(f"No NTP server reachable, continuing with RTC time. Retrying in {interval:.0f} s.")
+            offline_retry = min(offline_retry * 2, OFFLINE_RETRY_MAX)
+        sync_now_event.wait(interval)
+        sync_now_event.clear()
+
+# Function to run the next sync now instead of at the end of the current interval
+def request_sync():
+    sync_now_event.set()
+
+# Function to start the sync loop in a background thread
+def start_sync_thread(servers=NTP_SERVERS):
+    pause_event.set()
+    thread = threading.Thread(target=sync_rtc_with_ntp, args=(servers,), daemon=True, name="ntp-sync")
+    thread.start()
+    return thread
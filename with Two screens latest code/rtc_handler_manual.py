@@ -1,9 +1,10 @@
 #rtc_handler_manual.py
+import os
 import time
-import smbus2
-import ntplib  # NTP client for time sync
 from datetime import datetime, timedelta
 import threading
+
+import clock_backends  # Real, simulated and system-clock PCF8523 backends
 # I2C address for PCF8523
 PCF8523_ADDRESS = 0x68
 
@@ -12,12 +13,52 @@ SECONDS_REGISTER = 0x03
 MINUTES_REGISTER = 0x04
 HOURS_REGISTER = 0x05
 DAYS_REGISTER = 0x06
+WEEKDAYS_REGISTER = 0x07
 MONTHS_REGISTER = 0x08
 YEARS_REGISTER = 0x09
-# Initialize I2C bus
-bus = smbus2.SMBus(1)  # Use I2C bus 1 (common for Raspberry Pi)
-# Event to manage pause/resume
-pause_event = threading.Event()  
+# Seconds..Years are contiguous, so the whole time can be read in one transaction
+TIME_REGISTER_COUNT = YEARS_REGISTER - SECONDS_REGISTER + 1
+# Clock backend: "pcf8523" (real chip on I2C bus 1), "simulated" or "system"
+CLOCK_BACKEND = os.environ.get("MIDDAYMEAL_CLOCK_BACKEND", "pcf8523")
+CLOCK_BACKEND_OPTIONS = {}
+# I2C bus (or stand-in), opened on first use so importing this module needs no hardware
+bus = None
+# Seconds between reads of the RTC chip; in between, time is served from time.monotonic()
+RTC_REFRESH_INTERVAL = 60
+# Seconds to wait before reading the chip again after a failed read, so a
+# missing or faulty chip is not retried (and reported) on every display tick
+RTC_RETRY_INTERVAL = 10
+# Errors reading or writing the chip: I2C errors, bad register values, and
+# smbus2 not being installed (raised when the bus is opened on first use)
+RTC_ERRORS = (OSError, ValueError, ImportError)
+# Last time read from the chip and the time.monotonic() value at that read
+rtc_anchor = None
+# time.monotonic() of the last failed chip read, None after a successful one
+rtc_failed_time = None
+# Correction estimated by ntp_sync: (time.monotonic() reference, RTC offset in
+# seconds at the reference, drift in ppm). Positive values mean the chip is ahead.
+rtc_correction = None
+rtc_lock = threading.Lock()
+# Interval between chip reads while waiting for the seconds register to tick over
+SECOND_EDGE_POLL_INTERVAL = 0.005
+# Largest sub-second phase carried into a whole-second chip reading
+MAX_ANCHOR_PHASE = 0.999
+# Function to select the clock backend; takes effect on the next RTC access
+def set_clock_backend(name, **options):
+    global CLOCK_BACKEND, CLOCK_BACKEND_OPTIONS, bus, rtc_anchor, rtc_failed_time
+    CLOCK_BACKEND = name
+    CLOCK_BACKEND_OPTIONS = options
+    bus = None
+    rtc_anchor = None
+    rtc_failed_time = None
+
+# Function to get the I2C bus, opening the configured backend on first use
+def get_bus():
+    global bus
+    if bus is None:
+        bus = clock_backends.open_clock_backend(CLOCK_BACKEND, **CLOCK_BACKEND_OPTIONS)
+    return bus
+
 # Function to convert BCD to decimal
 def bcd_to_dec(bcd):
     return (bcd // 16) * 10 + (bcd % 16)
@@ -26,88 +67,151 @@ def bcd_to_dec(bcd):
 def dec_to_bcd(dec):
     return (dec // 10) * 16 + (dec % 10)
 
-# Function to read the current date and time from the PCF8523 RTC
-def get_rtc_time():
-    try:
-        seconds = bcd_to_dec(bus.read_byte_data(PCF8523_ADDRESS, SECONDS_REGISTER) & 0x7F)
-        minutes = bcd_to_dec(bus.read_byte_data(PCF8523_ADDRESS, MINUTES_REGISTER) & 0x7F)
-        hours = bcd_to_dec(bus.read_byte_data(PCF8523_ADDRESS, HOURS_REGISTER) & 0x3F)
-        day = bcd_to_dec(bus.read_byte_data(PCF8523_ADDRESS, DAYS_REGISTER) & 0x3F)
-        month = bcd_to_dec(bus.read_byte_data(PCF8523_ADDRESS, MONTHS_REGISTER) & 0x1F)
-        year = 2000 + bcd_to_dec(bus.read_byte_data(PCF8523_ADDRESS, YEARS_REGISTER))  # PCF8523 returns years since 2000
+# Lookup table for BCD decoding of every possible register value
+BCD_TO_DEC = tuple(bcd_to_dec(value) for value in range(256))
 
-        rtc_time = {
-            "time": f"{hours:02}:{minutes:02}:{seconds:02}",
-            "date": f"{day:02}/{month:02}/{year % 100:02}"
-        }
-        return rtc_time
+# Function to read the current date and time directly from the PCF8523 RTC chip.
+# All time registers are read in a single I2C block transfer; the chip latches
+# them for the duration of the transfer, so the result cannot tear across a
+# second or minute rollover.
+def read_rtc_chip():
+    seconds, minutes, hours, day, _weekday, month, year = get_bus().read_i2c_block_data(
+        PCF8523_ADDRESS, SECONDS_REGISTER, TIME_REGISTER_COUNT)
+    return datetime(2000 + BCD_TO_DEC[year],  # PCF8523 returns years since 2000
+                    BCD_TO_DEC[month & 0x1F],
+                    BCD_TO_DEC[day & 0x3F],
+                    BCD_TO_DEC[hours & 0x3F],
+                    BCD_TO_DEC[minutes & 0x7F],
+                    BCD_TO_DEC[seconds & 0x7F])
 
-    except OSError as e:
+# Function to re-read the chip and re-anchor the cached time to the monotonic clock.
+# The chip only reports whole seconds, so the sub-second phase of the previous
+# anchor (caught at a seconds tick by read_rtc_second_edge, or set by a write)
+# is carried forward, limited to what the new reading allows. Dropping it would
+# put up to a second of error under the ntp_sync offset correction.
+def refresh_rtc_time():
+    global rtc_anchor, rtc_failed_time
+    try:
+        read_start = time.monotonic()
+        rtc_now = read_rtc_chip()
+        read_monotonic = (read_start + time.monotonic()) / 2
+    except RTC_ERRORS as e:
         print(f"RTC Communication Error: {e}")
-        # Fallback to a default time or handle the error as necessary
+        rtc_failed_time = time.monotonic()
+        return False
+    rtc_failed_time = None
+    with rtc_lock:
+        if rtc_anchor is not None:
+            anchor_datetime, anchor_monotonic = rtc_anchor
+            predicted = anchor_datetime + timedelta(seconds=read_monotonic - anchor_monotonic)
+            # The chip's true time lies within [reading, reading + 1 s)
+            phase = (predicted - rtc_now).total_seconds()
+            rtc_now += timedelta(seconds=min(max(phase, 0.0), MAX_ANCHOR_PHASE))
+        rtc_anchor = (rtc_now, read_monotonic)
+    return True
+
+# Function to read the chip exactly when its seconds register ticks over.
+# The chip only reports whole seconds; catching the tick pins the reading down
+# to SECOND_EDGE_POLL_INTERVAL, which is what drift measurement needs.
+# Returns (datetime, time.monotonic() at the tick), or (None, None) on failure.
+def read_rtc_second_edge(timeout=1.5):
+    global rtc_anchor
+    try:
+        first = read_rtc_chip()
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            time.sleep(SECOND_EDGE_POLL_INTERVAL)
+            current = read_rtc_chip()
+            if current != first:
+                edge_monotonic = time.monotonic() - SECOND_EDGE_POLL_INTERVAL / 2
+                with rtc_lock:
+                    rtc_anchor = (current, edge_monotonic)
+                return current, edge_monotonic
+        print("RTC seconds register did not advance; is the oscillator running?")
+    except RTC_ERRORS as e:
+        print(f"RTC Communication Error: {e}")
+    return None, None
+
+# Function to set the drift correction applied to every time served by get_rtc_datetime
+def set_rtc_correction(reference_monotonic, offset, drift_ppm):
+    global rtc_correction
+    with rtc_lock:
+        rtc_correction = (reference_monotonic, offset, drift_ppm)
+
+# Function to get the current date and time of the PCF8523 RTC as a datetime,
+# or None if the chip has never been readable.
+# The chip is only read every RTC_REFRESH_INTERVAL seconds; in between the
+# time is advanced with time.monotonic(), so the display tick costs no I2C traffic.
+# After a failed read the chip is left alone for RTC_RETRY_INTERVAL seconds,
+# serving the last anchor (if any) in the meantime.
+# The drift correction estimated by ntp_sync is applied to the result.
+def get_rtc_datetime():
+    with rtc_lock:
+        anchor = rtc_anchor
+    now_monotonic = time.monotonic()
+    retry_due = rtc_failed_time is None or now_monotonic - rtc_failed_time >= RTC_RETRY_INTERVAL
+    if retry_due and (anchor is None or now_monotonic - anchor[1] >= RTC_REFRESH_INTERVAL):
+        if refresh_rtc_time():
+            with rtc_lock:
+                anchor = rtc_anchor
+    if anchor is None:
+        return None
+    rtc_datetime, anchor_monotonic = anchor
+    now_monotonic = time.monotonic()
+    elapsed = now_monotonic - anchor_monotonic
+    with rtc_lock:
+        correction = rtc_correction
+    if correction is not None:
+        reference_monotonic, offset, drift_ppm = correction
+        elapsed -= offset + drift_ppm * 1e-6 * (now_monotonic - reference_monotonic)
+    return rtc_datetime + timedelta(seconds=elapsed)
+
+# Function to format a datetime for the UI as {"time": "HH:MM:SS", "date": "DD/MM/YY"}
+def format_rtc_time(rtc_datetime):
+    if rtc_datetime is None:
+        # Fallback to a default time if the chip has never been readable
         return {
             "time": "00:00:00",
             "date": "01/01/2000"
         }
+    return {
+        "time": rtc_datetime.strftime("%H:%M:%S"),
+        "date": rtc_datetime.strftime("%d/%m/%y")
+    }
+
+# Function to get the current RTC time already formatted for the UI
+def get_rtc_time():
+    return format_rtc_time(get_rtc_datetime())
+
+# Function to set the PCF8523 RTC from a datetime
+def set_rtc_datetime(rtc_datetime):
+    set_rtc_time(rtc_datetime.hour, rtc_datetime.minute, rtc_datetime.second,
+                 rtc_datetime.day, rtc_datetime.month, rtc_datetime.year)
 
 # Function to set the time and date on the PCF8523 RTC
 def set_rtc_time(hour, minute, second, day, month, year):
+    global rtc_anchor, rtc_correction
+    # PCF8523 counts weekdays from Sunday = 0
+    weekday = datetime(year, month, day).isoweekday() % 7
     try:
-        bus.write_byte_data(PCF8523_ADDRESS, SECONDS_REGISTER, dec_to_bcd(second))
-        bus.write_byte_data(PCF8523_ADDRESS, MINUTES_REGISTER, dec_to_bcd(minute))
-        bus.write_byte_data(PCF8523_ADDRESS, HOURS_REGISTER, dec_to_bcd(hour))
-        bus.write_byte_data(PCF8523_ADDRESS, DAYS_REGISTER, dec_to_bcd(day))
-        bus.write_byte_data(PCF8523_ADDRESS, MONTHS_REGISTER, dec_to_bcd(month))
-        bus.write_byte_data(PCF8523_ADDRESS, YEARS_REGISTER, dec_to_bcd(year - 2000))  # Store year since 2000
-    except OSError as e:
+        # Write all time registers in one transaction so the chip never holds a half-set time
+        get_bus().write_i2c_block_data(PCF8523_ADDRESS, SECONDS_REGISTER, [
+            dec_to_bcd(second),
+            dec_to_bcd(minute),
+            dec_to_bcd(hour),
+            dec_to_bcd(day),
+            weekday,
+            dec_to_bcd(month),
+            dec_to_bcd(year - 2000),  # Store year since 2000
+        ])
+    except RTC_ERRORS as e:
         print(f"Error setting RTC time: {e}")
-
-# Function to get the server time using NTP, adjusted for IST (UTC +5:30)
-def get_ntp_time(ntp_server='pool.ntp.org'):
-    try:
-        client = ntplib.NTPClient()
-        response = client.request(ntp_server, version=3)
-        # Apply IST offset directly (UTC + 5:30)
-        ntp_time = datetime.utcfromtimestamp(response.tx_time) + timedelta(hours=5, minutes=30)
-        return ntp_time
-    except Exception as e:
-        print(f"Failed to fetch NTP time: {e}")
-        return None
-
-# Function to sync RTC with NTP server time (Adjusted for IST)
-def sync_rtc_with_ntp():
-    while True:
-        pause_event.wait()  # Wait here if operations are paused
-        ntp_time = get_ntp_time()
-
-        if ntp_time:
-            current_rtc = get_rtc_time()
-
-            rtc_time_parts = current_rtc['time'].split(":")
-            if len(rtc_time_parts) == 3:
-                rtc_hour, rtc_minute, rtc_second = map(int, rtc_time_parts)
-            elif len(rtc_time_parts) == 2:
-                rtc_hour, rtc_minute = map(int, rtc_time_parts)
-                rtc_second = 0  # Default to 0 seconds if not provided
-            else:
-                print("Invalid RTC time format.")
-                return
-
-            rtc_day, rtc_month, rtc_year = map(int, current_rtc['date'].split("/"))
-
-            if (rtc_hour != ntp_time.hour or
-                rtc_minute != ntp_time.minute or
-                rtc_second != ntp_time.second or
-                rtc_day != ntp_time.day or
-                rtc_month != ntp_time.month or
-                rtc_year != ntp_time.year % 100):
-
-                print(f"Updating RTC time from NTP server: {ntp_time}")
-                set_rtc_time(ntp_time.hour, ntp_time.minute, ntp_time.second,
-                             ntp_time.day, ntp_time.month, ntp_time.year)
-            else:
-                print("RTC time is already synchronized with NTP server.")
-        else:
-            print("NTP time fetch failed. Continuing with RTC time.")
-        
-        time.sleep(600)  # Retry every 10 minutes
\ No newline at end of file
+        refresh_rtc_time()  # The write may have been partial, trust the chip
+        return
+    # The chip now holds exactly what we wrote, so re-anchor without reading it back.
+    # Its offset is zero again, but it keeps drifting at the same rate.
+    write_monotonic = time.monotonic()
+    with rtc_lock:
+        rtc_anchor = (datetime(year, month, day, hour, minute, second), write_monotonic)
+        if rtc_correction is not None:
+            rtc_correction = (write_monotonic, 0.0, rtc_correction[2])
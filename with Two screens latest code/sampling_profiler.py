@@ -0,0 +1,104 @@
+#sampling_profiler.py
+# Low-overhead sampling profiler for field devices. A background thread looks
+# at the stack of every thread (sys._current_frames) at a fixed interval for a
+# number of seconds and counts identical stacks. The result is written in the
+# collapsed-stack format read by flamegraph.pl and speedscope:
+#     <thread>;<outermost function>;...;<innermost function> <samples>
+#
+#     flamegraph.pl profile_20250101_120000.folded > profile.svg
+import os
+import sys
+import threading
+import time
+
+SAMPLE_INTERVAL = 0.01  # Seconds between samples
+DEFAULT_DURATION = 30  # Seconds to profile for
+
+# Function to describe a stack frame as "file:function", or "file:function:line".
+# Without line numbers all samples in a function merge into one flame graph
+# box instead of one box per line it happened to be on.
+def frame_label(frame, line_numbers=False):
+    code = frame.f_code
+    label = f"{os.path.basename(code.co_filename)}:{code.co_name}"
+    if line_numbers:
+        label += f":{frame.f_lineno}"
+    return label
+
+# Samples all threads for a fixed time, see the module comment
+class SamplingProfiler:
+    def __init__(self, interval=SAMPLE_INTERVAL, line_numbers=False):
+        self.interval = interval
+        self.line_numbers = line_numbers  # Label frames with their line too, see frame_label()
+        self.stacks = {}  # collapsed stack -> samples
+        self.samples = 0
+        self.thread = None
+        self.stop_event = threading.Event()
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    # Function to take one sample of every thread except the profiler itself
+    def sample(self):
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        own_ident = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(frame_label(frame, self.line_numbers))
+                frame = frame.f_back
+            labels.append(thread_names.get(ident, f"thread-{ident}"))
+            stack = ";".join(reversed(labels))
+            self.stacks[stack] = self.stacks.get(stack, 0) + 1
+        self.samples += 1
+
+    def run(self, duration, path, on_done):
+        end_time = time.monotonic() + duration
+        next_sample = time.monotonic()
+        while not self.stop_event.is_set() and time.monotonic() < end_time:
+            self.sample()
+            next_sample = max(next_sample + self.interval, time.monotonic())
+            self.stop_event.wait(next_sample - time.monotonic())
+        try:
+            self.write(path)
+            print(f"Profile of {self.samples} samples written to {path}")
+        except OSError as e:
+            print(f"Error writing profile: {e}")
+        if on_done is not None:
+            on_done(path)
+
+    # Function to write the collapsed stacks, most sampled first
+    def write(self, path):
+        with open(path, "w") as profile_file:
+            for stack, samples in sorted(self.stacks.items(), key=lambda item: -item[1]):
+                profile_file.write(f"{stack} {samples}\n")
+
+    # Function to start profiling for duration seconds; the file is written when it ends.
+    # on_done(path) is called from the profiler thread afterwards.
+    def start(self, duration, path, on_done=None):
+        self.stacks = {}
+        self.samples = 0
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, args=(duration, path, on_done), daemon=True, name="profiler")
+        self.thread.start()
+
+    # Function to end profiling early; the file is still written
+    def stop(self):
+        self.stop_event.set()
+
+profiler = SamplingProfiler()
+
+# Function to start the profiler, or stop it if it is already running.
+# Returns True if profiling was started.
+def toggle_profiler(folder, duration=DEFAULT_DURATION, on_done=None, line_numbers=False):
+    if profiler.running:
+        profiler.stop()
+        return False
+    profiler.line_numbers = line_numbers
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f"profile_{time.strftime('%Y%m%d_%H%M%S')}.folded")
+    profiler.start(duration, path, on_done)
+    print(f"Profiling all threads for {duration} s")
+    return True
@@ -0,0 +1,236 @@
+#scale_drivers.py
+# Protocol drivers for the weighing scales we deploy.
+# Each driver knows how to pull bytes from the serial port (read) and how to
+# turn those bytes into weight readings (feed). uart_handler picks one by name,
+# so adding a scale brand means adding a driver here instead of forking
+# uart_handler.py.
+import re
+import struct
+
+# Largest amount of unparsed data a driver keeps before dropping the oldest bytes
+MAX_BUFFER_SIZE = 1024
+
+# A reading as the drivers return it: optional minus, number (decimals optional, as
+# in "500g"), unit
+READING_PATTERN = re.compile(r'(-?\d+(?:\.\d+)?)([a-zA-Z]+)')
+
+# Function to format a weight value the way the UI has always shown it (e.g. "1.250kg")
+def format_weight(value, unit, decimals):
+    return f"{value:.{decimals}f}{unit}"
+
+# Function to split a reading such as "1.250kg" back into (1.25, "kg"), or None
+# when it is not a reading (e.g. "Non" before the scale has sent one)
+def parse_weight(reading):
+    match = READING_PATTERN.fullmatch(reading)
+    if not match:
+        return None
+    return float(match.group(1)), match.group(2)
+
+# Base class for all scale protocol drivers
+class ScaleDriver:
+    name = None
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    # Pull whatever bytes are available from the serial port
+    def read(self, ser):
+        return ser.read(ser.in_waiting or 1)
+
+    # Parse newly received bytes and return the list of complete weight readings
+    def feed(self, data):
+        raise NotImplementedError
+
+    # Forget any partially received frame (e.g. after the port is reopened)
+    def reset(self):
+        self.buffer.clear()
+
+    def _trim_buffer(self):
+        if len(self.buffer) > MAX_BUFFER_SIZE:
+            del self.buffer[:-MAX_BUFFER_SIZE]
+
+# Scales that continuously print weights such as "ST,GS,+  1.250kg\r\n", or
+# just "   1.250kg   1.260kg" with no line endings at all.
+# By default a weight is complete once something other than a unit letter
+# follows it, which works with or without line endings. With
+# line_terminated=True only whole lines are parsed, for scales that print
+# other numbers with units (tare, counts) on the same line as the weight.
+class AsciiStreamDriver(ScaleDriver):
+    name = "ascii_stream"
+
+    # Number with a decimal point, optional sign, followed by the unit letters
+    WEIGHT_PATTERN = re.compile(rb'([+-]?)[ \t]*(\d+\.\d+)[ \t]*([a-zA-Z]+)')
+    LINE_END_PATTERN = re.compile(rb'[\r\n]+')
+
+    def __init__(self, line_terminated=False):
+        super().__init__()
+        self.line_terminated = line_terminated
+        # The first weight is usually cut in half when we start listening
+        # mid-stream, so it is dropped unless something precedes it
+        self.synced = False
+
+    def reset(self):
+        super().reset()
+        self.synced = False
+
+    def feed(self, data):
+        self.buffer += data
+        if self.line_terminated:
+            readings = self.feed_lines()
+        else:
+            readings = self.feed_stream()
+        self._trim_buffer()
+        return readings
+
+    # Function to take every weight whose unit is complete out of the buffer
+    def feed_stream(self):
+        readings = []
+        while True:
+            match = self.WEIGHT_PATTERN.search(self.buffer)
+            # A match that ends the buffer may still be missing unit letters
+            if match is None or match.end() == len(self.buffer):
+                break
+            reading = self.format_match(match)
+            del self.buffer[:match.end()]
+            if not self.synced:
+                self.synced = True
+                if match.start(2) == 0:
+                    continue  # Nothing before the digits, so the first ones may be missing
+            readings.append(reading)
+        if not self.WEIGHT_PATTERN.search(self.buffer):
+            # Keep only the tail that could be the start of the next weight
+            digits = re.search(rb'[+-]?[ \t]*[\d.]*$', self.buffer)
+            del self.buffer[:digits.start()]
+        return readings
+
+    # Function to take every complete line out of the buffer and parse it
+    def feed_lines(self):
+        readings = []
+        while True:
+            end = self.LINE_END_PATTERN.search(self.buffer)
+            if end is None:
+                break
+            line = bytes(self.buffer[:end.start()])
+            del self.buffer[:end.end()]
+            if not self.synced:
+                self.synced = True
+                continue
+            reading = self.parse_line(line)
+            if reading is not None:
+                readings.append(reading)
+        return readings
+
+    # Extract the weight from one complete line, or None if the line has no weight
+    def parse_line(self, line):
+        match = self.WEIGHT_PATTERN.search(line)
+        if not match:
+            return None
+        return self.format_match(match)
+
+    def format_match(self, match):
+        sign, number, unit = match.groups()
+        if sign == b"+":
+            sign = b""
+        return (sign + number + unit).decode('ascii')
+
+# Scales that only answer when asked, e.g. "W\r\n" -> "  1.250kg\r\n"
+class RequestResponseDriver(AsciiStreamDriver):
+    name = "request_response"
+
+    def __init__(self, command=b"W\r\n", terminator=b"\n"):
+        super().__init__(line_terminated=True)
+        self.command = command
+        self.terminator = terminator
+        # Every response is a whole line, so there is nothing to resync
+        self.synced = True
+
+    def reset(self):
+        super().reset()
+        self.synced = True
+
+    def read(self, ser):
+        ser.reset_input_buffer()  # Drop stale bytes so the reply matches this request
+        ser.write(self.command)
+        return ser.read_until(self.terminator)
+
+# Scales that send fixed-size binary frames:
+# STX | status | weight (signed int32, big endian) | decimals | unit code | checksum | ETX
+# The checksum is the XOR of the bytes between STX and the checksum.
+class BinaryFrameDriver(ScaleDriver):
+    """Placeholder protocol, not modelled on any scale we deploy.
+
+    The frame layout above is our own generic STX/ETX framing with an XOR
+    checksum, used to exercise the resync and checksum handling. Before a
+    binary scale goes into the field, change HEADER, FOOTER, PAYLOAD, UNITS
+    and parse_frame() to match the frame format documented for that scale.
+    """
+    name = "binary_frame"
+
+    HEADER = b"\x02"
+    FOOTER = b"\x03"
+    PAYLOAD = struct.Struct(">BiBB")
+    FRAME_SIZE = len(HEADER) + PAYLOAD.size + 1 + len(FOOTER)
+    UNITS = {0: "g", 1: "kg", 2: "lb", 3: "oz"}
+    STATUS_STABLE = 0x01
+
+    def __init__(self, stable_only=False):
+        super().__init__()
+        self.stable_only = stable_only
+
+    def feed(self, data):
+        self.buffer += data
+        readings = []
+        while True:
+            start = self.buffer.find(self.HEADER)
+            if start < 0:
+                self.buffer.clear()
+                break
+            if start > 0:
+                del self.buffer[:start]  # Skip noise before the frame header
+            if len(self.buffer) < self.FRAME_SIZE:
+                break
+            frame = bytes(self.buffer[:self.FRAME_SIZE])
+            reading = self.parse_frame(frame)
+            if reading is False:
+                # Not a real frame start, resync on the next header byte
+                del self.buffer[:1]
+                continue
+            del self.buffer[:self.FRAME_SIZE]
+            if reading is not None:
+                readings.append(reading)
+        self._trim_buffer()
+        return readings
+
+    # Decode one frame; False if it is corrupt, None if it carries no usable weight
+    def parse_frame(self, frame):
+        if not frame.endswith(self.FOOTER):
+            return False
+        payload = frame[len(self.HEADER):len(self.HEADER) + self.PAYLOAD.size]
+        checksum = frame[len(self.HEADER) + self.PAYLOAD.size]
+        calculated = 0
+        for byte in payload:
+            calculated ^= byte
+        if calculated != checksum:
+            return False
+        status, raw_weight, decimals, unit_code = self.PAYLOAD.unpack(payload)
+        if self.stable_only and not status & self.STATUS_STABLE:
+            return None
+        unit = self.UNITS.get(unit_code)
+        if unit is None:
+            return None
+        return format_weight(raw_weight / 10 ** decimals, unit, decimals)
+
+# Registry of available drivers, keyed by the name passed to uart_handler.setup_uart
+SCALE_DRIVERS = {
+    AsciiStreamDriver.name: AsciiStreamDriver,
+    RequestResponseDriver.name: RequestResponseDriver,
+    BinaryFrameDriver.name: BinaryFrameDriver,
+}
+
+# Function to create a driver by name
+def get_scale_driver(name, **options):
+    try:
+        driver_class = SCALE_DRIVERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown scale driver '{name}'. Available: {', '.join(SCALE_DRIVERS)}")
+    return driver_class(**options)
@@ -0,0 +1,231 @@
+#serial_replay.py
+# Record raw serial traffic from a weighing scale and replay it without hardware.
+#
+# Trace files are plain text, one chunk per line:
+#     <seconds since start of recording> <chunk as hex>
+# Lines starting with '#' are comments.
+#
+# Usage:
+#     python serial_replay.py record /dev/ttyS0 scale.trace --seconds 60
+#     python serial_replay.py bench scale.trace --driver ascii_stream
+import argparse
+import threading
+import time
+
+import scale_drivers
+
+# Shortest time a looped trace takes to play once, so a trace with a single
+# chunk or all-zero timestamps cannot release data endlessly
+MIN_LOOP_PERIOD = 0.1  # Seconds
+# Most bytes released in one go when replaying as fast as possible
+MAX_RELEASE_SIZE = 4096
+
+# Function to load a trace file into a list of (timestamp, bytes) chunks
+def load_trace(path):
+    chunks = []
+    with open(path) as trace_file:
+        for line in trace_file:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            timestamp, _, data = line.partition(" ")
+            chunks.append((float(timestamp), bytes.fromhex(data)))
+    return chunks
+
+# Wraps a real serial.Serial and writes every chunk it reads to a trace file
+class RecordingSerial:
+    def __init__(self, ser, path):
+        self.ser = ser
+        self.trace_file = open(path, "w")
+        self.trace_file.write(f"# port={ser.port} baudrate={ser.baudrate}\n")
+        self.start_time = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _record(self, data):
+        if data:
+            with self.lock:
+                self.trace_file.write(f"{time.monotonic() - self.start_time:.6f} {data.hex()}\n")
+                self.trace_file.flush()
+        return data
+
+    def read(self, size=1):
+        return self._record(self.ser.read(size))
+
+    def read_until(self, expected=b"\n", size=None):
+        return self._record(self.ser.read_until(expected, size))
+
+    def close(self):
+        self.ser.close()
+        with self.lock:
+            self.trace_file.close()
+
+    # Everything else (write, in_waiting, is_open, ...) goes straight to the port
+    def __getattr__(self, name):
+        return getattr(self.ser, name)
+
+# Function to get how long one pass of a looped trace takes: the last
+# timestamp plus the mean gap between chunks, so the first chunk of the next
+# pass does not land on top of the last one
+def loop_period(chunks):
+    if not chunks:
+        return MIN_LOOP_PERIOD
+    last = chunks[-1][0]
+    mean_gap = last / (len(chunks) - 1) if len(chunks) > 1 else 0
+    return max(last + mean_gap, MIN_LOOP_PERIOD)
+
+# Stand-in for serial.Serial that plays back a recorded trace.
+# speed=1.0 replays in real time, 10.0 ten times faster, 0 as fast as possible.
+class ReplaySerial:
+    def __init__(self, path, speed=1.0, timeout=2, loop=False):
+        self.port = path
+        self.chunks = load_trace(path)
+        self.speed = speed
+        self.timeout = timeout
+        self.loop = loop
+        self.is_open = True
+        self.written = bytearray()  # Commands sent to the "scale", for request/response drivers
+        self.position = 0  # Index of the next chunk to release
+        self.pending = bytearray()  # Released bytes not yet read
+        self.start_time = time.monotonic()
+        self.loop_offset = 0.0
+        self.loop_period = loop_period(self.chunks)
+
+    # Move every chunk whose timestamp has passed into the pending buffer
+    def _release(self):
+        if self.speed:
+            elapsed = (time.monotonic() - self.start_time) * self.speed
+        else:
+            elapsed = float("inf")
+        while True:
+            if self.position >= len(self.chunks):
+                if not self.loop or not self.chunks:
+                    return
+                self.position = 0
+                self.loop_offset += self.loop_period
+            timestamp, data = self.chunks[self.position]
+            if timestamp + self.loop_offset > elapsed:
+                return
+            self.pending += data
+            self.position += 1
+            if not self.speed and len(self.pending) >= MAX_RELEASE_SIZE:
+                return  # Don't load an endless looped trace into memory at once
+
+    # Seconds of wall time until the next chunk is due, or None at the end of the trace
+    def _time_to_next_chunk(self):
+        if self.position >= len(self.chunks) and not self.loop:
+            return None
+        if not self.speed:
+            return 0
+        timestamp = self.chunks[self.position % len(self.chunks)][0] + self.loop_offset
+        due = self.start_time + timestamp / self.speed
+        return max(due - time.monotonic(), 0)
+
+    @property
+    def exhausted(self):
+        return self.position >= len(self.chunks) and not self.loop and not self.pending
+
+    @property
+    def in_waiting(self):
+        self._release()
+        return len(self.pending)
+
+    def _wait_for(self, condition):
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while True:
+            self._release()
+            if condition():
+                return
+            wait = self._time_to_next_chunk()
+            if wait is None:
+                return
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    def read(self, size=1):
+        self._wait_for(lambda: len(self.pending) >= size)
+        data = bytes(self.pending[:size])
+        del self.pending[:size]
+        return data
+
+    def read_until(self, expected=b"\n", size=None):
+        def complete():
+            return expected in self.pending or (size is not None and len(self.pending) >= size)
+        self._wait_for(complete)
+        end = self.pending.find(expected)
+        end = len(self.pending) if end < 0 else end + len(expected)
+        if size is not None:
+            end = min(end, size)
+        data = bytes(self.pending[:end])
+        del self.pending[:end]
+        return data
+
+    def write(self, data):
+        self.written += data
+        return len(data)
+
+    def reset_input_buffer(self):
+        self._release()
+        self.pending.clear()
+
+    def close(self):
+        self.is_open = False
+
+# Function to record a serial port to a trace file for a number of seconds
+def record(port, path, seconds, baudrate=9600):
+    import serial
+    ser = RecordingSerial(serial.Serial(port, baudrate=baudrate, timeout=0.1), path)
+    end_time = time.monotonic() + seconds
+    while time.monotonic() < end_time:
+        ser.read(ser.in_waiting or 1)
+    ser.close()
+    print(f"Recorded {seconds} s of {port} to {path}")
+
+# Function to push a trace through a scale driver and report parser throughput
+def bench(path, driver_name, repeat=100):
+    chunks = load_trace(path)
+    total_bytes = sum(len(data) for _, data in chunks) * repeat
+    latencies = []
+    readings = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        driver = scale_drivers.get_scale_driver(driver_name)
+        for _, data in chunks:
+            chunk_start = time.perf_counter()
+            readings += len(driver.feed(data))
+            latencies.append(time.perf_counter() - chunk_start)
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    print(f"Driver: {driver_name}")
+    print(f"Bytes parsed: {total_bytes} in {elapsed:.3f} s ({total_bytes / elapsed / 1e6:.2f} MB/s)")
+    print(f"Readings: {readings} ({readings / elapsed:.0f}/s)")
+    if latencies:
+        print(f"Per-chunk latency: p50 {latencies[len(latencies) // 2] * 1e6:.1f} us, "
+              f"p99 {latencies[int(len(latencies) * 0.99)] * 1e6:.1f} us")
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and replay weighing scale serial traffic")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="Record a serial port to a trace file")
+    record_parser.add_argument("port")
+    record_parser.add_argument("trace")
+    record_parser.add_argument("--seconds", type=float, default=60)
+    record_parser.add_argument("--baudrate", type=int, default=9600)
+
+    bench_parser = commands.add_parser("bench", help="Measure parser throughput on a trace file")
+    bench_parser.add_argument("trace")
+    bench_parser.add_argument("--driver", default="ascii_stream", choices=list(scale_drivers.SCALE_DRIVERS))
+    bench_parser.add_argument("--repeat", type=int, default=100)
+
+    args = parser.parse_args()
+    if args.command == "record":
+        record(args.port, args.trace, args.seconds, args.baudrate)
+    else:
+        bench(args.trace, args.driver, args.repeat)
+
+if __name__ == "__main__":
+    main()
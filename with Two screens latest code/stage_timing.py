@@ -0,0 +1,148 @@
+#stage_timing.py
+# Lightweight timing for the hot paths (display loop, capture threads, UART
+# reader, image saving). Each stage keeps a count, total, maximum and a
+# histogram in a fixed list of buckets, so recording is a few additions and
+# memory does not grow however long the kiosk runs. Counters count events
+# such as frames grabbed or UART readings.
+#
+#     with stage_timing.timed("display.render"):
+#         ...
+#     stage_timing.record("uart.parse", seconds)
+#     stage_timing.count("uart.readings")
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds in seconds; the last bucket holds everything slower
+BUCKET_BOUNDS = [0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0]
+
+# Timing histogram for one stage
+class StageHistogram:
+    def __init__(self, name):
+        self.name = name
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        index = 0
+        while index < len(BUCKET_BOUNDS) and seconds > BUCKET_BOUNDS[index]:
+            index += 1
+        with self.lock:
+            self.buckets[index] += 1
+            self.count += 1
+            self.total += seconds
+            self.last = seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    # Estimate a percentile (0-100) as the upper bound of the bucket it falls in
+    def percentile(self, p):
+        with self.lock:
+            buckets, count, maximum = list(self.buckets), self.count, self.max
+        if not count:
+            return 0.0
+        target = count * p / 100
+        seen = 0
+        for index, bucket_count in enumerate(buckets):
+            seen += bucket_count
+            if seen >= target and bucket_count:
+                return min(BUCKET_BOUNDS[index], maximum) if index < len(BUCKET_BOUNDS) else maximum
+        return maximum
+
+    def snapshot(self):
+        with self.lock:
+            snapshot = {
+                "count": self.count,
+                "mean_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+                "sum_s": self.total,
+                "last_ms": round(self.last * 1000, 3),
+                "max_ms": round(self.max * 1000, 3),
+                "buckets": list(self.buckets),
+            }
+        snapshot["p50_ms"] = round(self.percentile(50) * 1000, 3)
+        snapshot["p95_ms"] = round(self.percentile(95) * 1000, 3)
+        return snapshot
+
+    def reset(self):
+        with self.lock:
+            self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+            self.count = 0
+            self.total = 0.0
+            self.max = 0.0
+            self.last = 0.0
+
+# All stages and counters, keyed by name
+stages = {}
+counters = {}
+registry_lock = threading.Lock()
+start_time = time.monotonic()
+
+# Function to get (creating on first use) the histogram of a stage
+def get_stage(name):
+    histogram = stages.get(name)
+    if histogram is None:
+        with registry_lock:
+            histogram = stages.setdefault(name, StageHistogram(name))
+    return histogram
+
+# Function to record the duration of one run of a stage, in seconds
+def record(name, seconds):
+    get_stage(name).record(seconds)
+
+# Function to time the block inside a with statement as one run of a stage
+@contextmanager
+def timed(name):
+    histogram = get_stage(name)
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        histogram.record(time.monotonic() - start)
+
+# Function to add to an event counter
+def count(name, amount=1):
+    with registry_lock:
+        counters[name] = counters.get(name, 0) + amount
+
+# Function to get all stages and counters as a dict
+def snapshot():
+    with registry_lock:
+        histograms = list(stages.values())
+        counter_values = dict(counters)
+    return {
+        "uptime_s": round(time.monotonic() - start_time, 1),
+        "bucket_bounds_ms": [bound * 1000 for bound in BUCKET_BOUNDS],
+        "stages": {histogram.name: histogram.snapshot() for histogram in sorted(histograms, key=lambda h: h.name)},
+        "counters": dict(sorted(counter_values.items())),
+    }
+
+# Function to format the stats as short lines for the on-screen panel
+def format_stats():
+    stats = snapshot()
+    lines = [f"Uptime {stats['uptime_s']:.0f} s   (ms: last / p50 / p95 / max)"]
+    for name, stage in stats["stages"].items():
+        lines.append(f"{name}: {stage['last_ms']:.1f} / {stage['p50_ms']:.1f} / "
+                     f"{stage['p95_ms']:.1f} / {stage['max_ms']:.1f}  n={stage['count']}")
+    for name, value in stats["counters"].items():
+        lines.append(f"{name}: {value}")
+    return "\n".join(lines)
+
+# Function to write the stats to a JSON file
+def dump_stats(path):
+    with open(path, "w") as stats_file:
+        json.dump(snapshot(), stats_file, indent=2)
+    return path
+
+# Function to clear all stages and counters
+def reset():
+    with registry_lock:
+        histograms = list(stages.values())
+        counters.clear()
+    for histogram in histograms:
+        histogram.reset()
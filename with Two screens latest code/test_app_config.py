@@ -0,0 +1,31 @@
+#test_app_config.py
+# Loading and checking the device configuration file (app_config.py).
+# Run with: python -m pytest test_app_config.py
+import pytest
+
+import app_config
+
+# Function to write a TOML config file and load it
+def load(tmp_path, text):
+    path = tmp_path / "config.toml"
+    path.write_text(text)
+    return app_config.load_config(str(path), device="test")
+
+def test_fractional_fps(tmp_path):
+    settings = load(tmp_path, "[cameras.face]\nfps = 7.5\n[display]\nfps = 15.0\nmin_fps = 0.5\n")
+    assert settings["cameras"]["face"]["fps"] == 7.5
+    assert settings["display"]["fps"] == 15.0
+    with pytest.raises(app_config.ConfigError, match="cameras.face.width"):
+        load(tmp_path, "[cameras.face]\nwidth = 320.5\n")
+
+def test_driver_options(tmp_path):
+    settings = load(tmp_path, '[uart]\ndriver = "request_response"\ndriver_options = { command = "P\\r\\n" }\n')
+    options = settings["uart"]["driver_options"]
+    assert app_config.convert_driver_options("request_response", options) == {"command": b"P\r\n"}
+
+def test_driver_options_checked_against_driver(tmp_path):
+    # line_terminated belongs to ascii_stream, not binary_frame
+    with pytest.raises(app_config.ConfigError, match="line_terminated"):
+        load(tmp_path, '[uart]\ndriver = "binary_frame"\ndriver_options = { line_terminated = true }\n')
+    with pytest.raises(app_config.ConfigError, match="stable_only"):
+        load(tmp_path, '[uart]\ndriver = "binary_frame"\ndriver_options = { stable_only = "yes" }\n')
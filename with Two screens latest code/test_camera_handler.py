@@ -0,0 +1,112 @@
+#test_camera_handler.py
+# Camera capture against recorded MJPEG files (camera_sources.py), including
+# the optional raw MJPEG mode.
+# Run with: python -m pytest test_camera_handler.py
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+import camera_handler
+import camera_sources
+
+# Function to write a small MJPEG recording whose frames differ in brightness
+def write_mjpeg(path, count=5, width=64, height=48):
+    with open(path, "wb") as mjpeg_file:
+        for i in range(count):
+            image = np.full((height, width, 3), 40 * i, dtype=np.uint8)
+            mjpeg_file.write(cv2.imencode(".jpg", image)[1].tobytes())
+    return str(path)
+
+@pytest.fixture
+def camera_role(tmp_path):
+    role = "test"
+    camera_handler.CAMERA_ROLES[role] = "mjpeg:" + write_mjpeg(tmp_path / "rec.mjpeg")
+    camera_handler.CAMERA_SETTINGS[role] = {"fourcc": "MJPG", "fps": 0, "raw_mjpeg": False, "display_scale": 1}
+    yield role
+    for table in (camera_handler.CAMERA_ROLES, camera_handler.CAMERA_SETTINGS, camera_handler.resolved_cameras,
+                  camera_handler.negotiated_settings, camera_handler.camera_states):
+        table.pop(role, None)
+
+# Function to open a role and start its capture loop
+def start_capture(role):
+    pause_event = threading.Event()
+    pause_event.set()
+    capture = camera_handler.CameraCapture(role, pause_event)
+    capture.cap = camera_handler.open_camera(role)
+    assert capture.cap is not None
+    capture.start()
+    return capture
+
+def test_split_mjpeg(tmp_path):
+    with open(write_mjpeg(tmp_path / "rec.mjpeg", count=3), "rb") as mjpeg_file:
+        frames = camera_sources.split_mjpeg(b"junk" + mjpeg_file.read())
+    assert len(frames) == 3
+    assert all(frame.startswith(b"\xff\xd8") and frame.endswith(b"\xff\xd9") for frame in frames)
+
+def test_raw_mjpeg_is_off_by_default():
+    for settings in camera_handler.CAMERA_SETTINGS.values():
+        assert not settings.get("raw_mjpeg")
+
+def test_decoded_frames_by_default(camera_role):
+    capture = start_capture(camera_role)
+    try:
+        frame = capture.get_frame(fresh=True)
+        assert frame.shape == (48, 64, 3)
+        assert capture.frame.shape == (48, 64, 3)  # Decoded by the source, not kept as JPEG
+        assert not camera_handler.negotiated_settings[camera_role]["raw_mjpeg"]
+    finally:
+        capture.release()
+
+def test_raw_mjpeg_decodes_on_demand(camera_role):
+    camera_handler.CAMERA_SETTINGS[camera_role]["raw_mjpeg"] = True
+    capture = start_capture(camera_role)
+    try:
+        frame = capture.get_frame(fresh=True)
+        assert camera_handler.negotiated_settings[camera_role]["raw_mjpeg"]
+        assert camera_handler.is_jpeg_buffer(capture.frame)
+        assert frame.shape == (48, 64, 3)
+        # Reduced-scale decode straight from the JPEG data
+        assert capture.get_frame(scale=2).shape == (24, 32, 3)
+        # Each frame is decoded once per scale
+        buffer, seq = capture.frame, capture.frame_seq
+        image = capture._decode(buffer, seq, 1)
+        decoded = capture.frames_decoded
+        assert capture._decode(buffer, seq, 1) is image
+        assert capture.frames_decoded == decoded
+    finally:
+        capture.release()
+
+def test_raw_mjpeg_falls_back_without_mjpg(camera_role):
+    # The generated test pattern is not MJPG, like a driver that refused the format
+    camera_handler.CAMERA_ROLES[camera_role] = "pattern:"
+    camera_handler.CAMERA_SETTINGS[camera_role]["raw_mjpeg"] = True
+    cap = camera_handler.open_camera(camera_role)
+    try:
+        assert cap.get(cv2.CAP_PROP_CONVERT_RGB) == 1
+        assert not camera_handler.negotiated_settings[camera_role]["raw_mjpeg"]
+        ok, frame = cap.read()
+        assert ok and frame.ndim == 3
+    finally:
+        cap.release()
+
+def test_is_jpeg_buffer():
+    assert camera_handler.is_jpeg_buffer(np.array([[0xFF, 0xD8, 0xFF, 0xE0]], dtype=np.uint8))
+    assert not camera_handler.is_jpeg_buffer(np.zeros((1, 4), dtype=np.uint8))  # e.g. raw YUYV
+    assert not camera_handler.is_jpeg_buffer(np.zeros((48, 64, 3), dtype=np.uint8))
+    assert not camera_handler.is_jpeg_buffer(None)
+
+def test_settings_changed_after_construction_apply_at_start(camera_role):
+    # kiosk_core creates its captures at import time, before the config file is applied
+    pause_event = threading.Event()
+    pause_event.set()
+    capture = camera_handler.CameraCapture(camera_role, pause_event)
+    camera_handler.CAMERA_SETTINGS[camera_role].update(fps=5, display_scale=4)
+    thread = capture.start()
+    try:
+        assert capture.target_fps == 5
+        assert capture.display_scale == 4
+    finally:
+        capture.release()
+        thread.join(5)
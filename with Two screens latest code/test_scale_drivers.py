@@ -0,0 +1,118 @@
+#test_scale_drivers.py
+# Scale drivers against captured byte traces (traces/*.trace, see serial_replay.py).
+# Run with: python -m pytest test_scale_drivers.py
+import os
+
+import scale_drivers
+import serial_replay
+
+TRACE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "traces")
+
+# Function to feed every chunk of a trace to a driver and collect the readings
+def feed_trace(driver, name):
+    readings = []
+    for _, data in serial_replay.load_trace(os.path.join(TRACE_DIR, name)):
+        readings += driver.feed(data)
+    return readings
+
+def test_ascii_stream_without_line_endings():
+    # Starts mid-weight ("50kg"), numbers and units split across chunks; the
+    # last weight stays buffered until something follows its unit
+    driver = scale_drivers.get_scale_driver("ascii_stream")
+    assert feed_trace(driver, "ascii_stream.trace") == ["1.260kg", "1.270kg", "-0.015kg", "0.000kg"]
+
+def test_ascii_stream_unterminated_single_chunk():
+    driver = scale_drivers.get_scale_driver("ascii_stream")
+    assert driver.feed(b"   1.250kg   1.260kg") == ["1.250kg"]
+    assert driver.feed(b"   ") == ["1.260kg"]
+
+def test_ascii_stream_drops_partial_first_weight():
+    driver = scale_drivers.get_scale_driver("ascii_stream")
+    assert driver.feed(b"0.250kg   1.300kg ") == ["1.300kg"]
+
+def test_ascii_stream_lines():
+    # The partial first line ("0kg") is dropped, the rest split mid-number and mid-line ending
+    for options in ({}, {"line_terminated": True}):
+        driver = scale_drivers.get_scale_driver("ascii_stream", **options)
+        assert feed_trace(driver, "ascii_lines.trace") == ["1.250kg", "-0.015kg", "1.300kg"]
+
+def test_ascii_stream_line_terminated_waits_for_line_end():
+    driver = scale_drivers.get_scale_driver("ascii_stream", line_terminated=True)
+    assert driver.feed(b"\r\n  1.250kg  ") == []
+    assert driver.feed(b"\r\n") == ["1.250kg"]
+
+def test_ascii_stream_buffer_is_bounded():
+    driver = scale_drivers.get_scale_driver("ascii_stream")
+    driver.feed(b"x" * 10 * scale_drivers.MAX_BUFFER_SIZE)
+    assert len(driver.buffer) <= scale_drivers.MAX_BUFFER_SIZE
+
+# Port that answers each command with the next recorded reply
+class ScriptedScale:
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.written = bytearray()
+        self.pending = bytearray(b"0kg\r\n")  # Stale bytes from before the request
+
+    def reset_input_buffer(self):
+        self.pending.clear()
+
+    def write(self, data):
+        self.written += data
+        self.pending += self.replies.pop(0)
+
+    def read_until(self, expected=b"\n"):
+        end = self.pending.find(expected) + len(expected)
+        data = bytes(self.pending[:end])
+        del self.pending[:end]
+        return data
+
+def test_request_response_trace():
+    driver = scale_drivers.get_scale_driver("request_response")
+    chunks = serial_replay.load_trace(os.path.join(TRACE_DIR, "request_response.trace"))
+    ser = ScriptedScale(data for _, data in chunks)
+    readings = []
+    for _ in chunks:
+        readings += driver.feed(driver.read(ser))
+    assert readings == ["1.250kg", "-0.020kg", "0.000kg"]
+    assert ser.written == b"W\r\n" * len(chunks)
+
+def test_request_response_split_reply():
+    driver = scale_drivers.get_scale_driver("request_response")
+    assert driver.feed(b"  1.2") == []
+    assert driver.feed(b"50kg\r\n") == ["1.250kg"]
+
+def test_binary_frame_trace():
+    # Noise with a stray STX before the first frame, a frame with a bad
+    # checksum (skipped), a negative weight and a weight in grams
+    driver = scale_drivers.get_scale_driver("binary_frame")
+    assert feed_trace(driver, "binary_frame.trace") == ["1.250kg", "-0.015kg", "500g"]
+
+def test_binary_frame_stable_only():
+    driver = scale_drivers.get_scale_driver("binary_frame", stable_only=True)
+    assert feed_trace(driver, "binary_frame.trace") == ["1.250kg", "-0.015kg"]
+
+def test_binary_frame_byte_at_a_time():
+    driver = scale_drivers.get_scale_driver("binary_frame")
+    readings = []
+    for _, data in serial_replay.load_trace(os.path.join(TRACE_DIR, "binary_frame.trace")):
+        for byte in data:
+            readings += driver.feed(bytes([byte]))
+    assert readings == ["1.250kg", "-0.015kg", "500g"]
+
+def test_unknown_driver():
+    try:
+        scale_drivers.get_scale_driver("no_such_scale")
+    except ValueError as e:
+        assert "ascii_stream" in str(e)
+    else:
+        raise AssertionError("expected ValueError")
+
+def test_parse_weight():
+    assert scale_drivers.parse_weight("1.250kg") == (1.25, "kg")
+    assert scale_drivers.parse_weight("-0.015kg") == (-0.015, "kg")
+    assert scale_drivers.parse_weight("500g") == (500.0, "g")
+    assert scale_drivers.parse_weight("Non") is None
+    # Every reading the drivers produce parses back
+    driver = scale_drivers.get_scale_driver("binary_frame")
+    for reading in feed_trace(driver, "binary_frame.trace"):
+        assert scale_drivers.parse_weight(reading) is not None
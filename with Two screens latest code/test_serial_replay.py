@@ -0,0 +1,105 @@
+#test_serial_replay.py
+# Trace recording and replay (serial_replay.py).
+# Run with: python -m pytest test_serial_replay.py
+import os
+import time
+
+import serial_replay
+
+TRACE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "traces")
+
+# Function to write a trace file from (timestamp, bytes) chunks
+def write_trace(path, chunks):
+    with open(path, "w") as trace_file:
+        trace_file.write("# test trace\n")
+        for timestamp, data in chunks:
+            trace_file.write(f"{timestamp} {data.hex()}\n")
+    return str(path)
+
+def test_load_trace_skips_comments():
+    chunks = serial_replay.load_trace(os.path.join(TRACE_DIR, "ascii_lines.trace"))
+    assert len(chunks) == 3
+    assert chunks[0] == (0.1, b"0kg\r\nST,GS,+  1.2")
+
+def test_replay_as_fast_as_possible(tmp_path):
+    path = write_trace(tmp_path / "a.trace", [(0.5, b"abc"), (1.0, b"def")])
+    ser = serial_replay.ReplaySerial(path, speed=0)
+    assert ser.read(6) == b"abcdef"
+    assert ser.exhausted
+
+def test_replay_honours_timestamps(tmp_path):
+    path = write_trace(tmp_path / "a.trace", [(0.0, b"a"), (0.2, b"b")])
+    ser = serial_replay.ReplaySerial(path, speed=1.0, timeout=1)
+    assert ser.in_waiting == 1
+    start = time.monotonic()
+    assert ser.read(2) == b"ab"
+    assert 0.1 < time.monotonic() - start < 0.5
+
+def test_read_times_out_at_end_of_trace(tmp_path):
+    path = write_trace(tmp_path / "a.trace", [(0.0, b"ab")])
+    ser = serial_replay.ReplaySerial(path, speed=0, timeout=0.05)
+    assert ser.read(10) == b"ab"
+    assert ser.read(10) == b""
+
+def test_read_until(tmp_path):
+    path = write_trace(tmp_path / "a.trace", [(0.0, b"1.0kg\r\n2.0"), (0.0, b"kg\r\n")])
+    ser = serial_replay.ReplaySerial(path, speed=0)
+    assert ser.read_until(b"\n") == b"1.0kg\r\n"
+    assert ser.read_until(b"\n") == b"2.0kg\r\n"
+
+def test_loop_repeats_trace(tmp_path):
+    path = write_trace(tmp_path / "a.trace", [(0.0, b"a"), (0.1, b"b")])
+    ser = serial_replay.ReplaySerial(path, speed=0, loop=True)
+    assert ser.read(6) == b"ababab"
+    assert not ser.exhausted
+
+def test_loop_with_zero_timestamps_is_bounded(tmp_path):
+    # A single chunk at time 0 used to spin forever while the pending bytes grew
+    path = write_trace(tmp_path / "a.trace", [(0.0, b"1.250kg\r\n")])
+    ser = serial_replay.ReplaySerial(path, speed=1.0, loop=True)
+    assert ser.in_waiting == 9
+    assert ser.in_waiting == 9  # The next pass is not due yet
+    ser.start_time -= serial_replay.MIN_LOOP_PERIOD
+    assert ser.in_waiting == 18
+
+def test_loop_as_fast_as_possible_is_bounded(tmp_path):
+    path = write_trace(tmp_path / "a.trace", [(0.0, b"x")])
+    ser = serial_replay.ReplaySerial(path, speed=0, loop=True)
+    assert ser.in_waiting == serial_replay.MAX_RELEASE_SIZE
+
+def test_loop_period():
+    assert serial_replay.loop_period([(0.0, b"a"), (1.0, b"b"), (2.0, b"c")]) == 3.0
+    assert serial_replay.loop_period([(0.0, b"a")]) == serial_replay.MIN_LOOP_PERIOD
+    assert serial_replay.loop_period([]) == serial_replay.MIN_LOOP_PERIOD
+
+def test_reset_input_buffer_and_write(tmp_path):
+    path = write_trace(tmp_path / "a.trace", [(0.0, b"stale")])
+    ser = serial_replay.ReplaySerial(path, speed=0)
+    ser.reset_input_buffer()
+    assert ser.in_waiting == 0
+    ser.write(b"W\r\n")
+    assert ser.written == b"W\r\n"
+
+# Port that hands out fixed chunks, standing in for serial.Serial when recording
+class FakePort:
+    port = "/dev/fake"
+    baudrate = 9600
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+
+    def read(self, size=1):
+        return self.chunks.pop(0) if self.chunks else b""
+
+    def close(self):
+        pass
+
+def test_record_then_replay(tmp_path):
+    path = str(tmp_path / "rec.trace")
+    recorder = serial_replay.RecordingSerial(FakePort([b"1.2", b"", b"50kg\r\n"]), path)
+    assert recorder.baudrate == 9600  # Other attributes come from the real port
+    for _ in range(3):
+        recorder.read(10)
+    recorder.close()
+    assert [data for _, data in serial_replay.load_trace(path)] == [b"1.2", b"50kg\r\n"]
+    assert serial_replay.ReplaySerial(path, speed=0).read(9) == b"1.250kg\r\n"
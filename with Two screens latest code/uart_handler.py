@@ -1,65 +1,81 @@
 #uart_handler.py
 import serial
 import time
-import re
 import threading
 
+import scale_drivers  # Protocol parsers for the supported weighing scales
+import serial_replay  # Trace recorder and hardware-free replay of the scale
+import stage_timing  # Hot-path timing histograms
+
+# Serial port of the weighing scale
+SERIAL_PORT = '/dev/ttyS0'
+BAUDRATE = 9600
+SERIAL_TIMEOUT = 2  # Seconds
+UART_RETRY_INTERVAL = 10  # Seconds between attempts to reopen a missing port
+
 # Global variables
 ser = None
 weight = "Non"  # Initialize the weight as a global variable
 SerialFailCount = 0
 pause_event = threading.Event()  # Event to manage pause/resume
+scale_driver = scale_drivers.get_scale_driver("ascii_stream")  # Protocol of the connected scale
+uart_setup_options = {}  # Arguments of the last setup_uart() call, to reopen the port with
+
 # Function to set up UART
-def setup_uart():
-    global ser
+# replay_file plays back a recorded trace instead of opening the port,
+# record_file writes everything read from the real port to a trace file.
+def setup_uart(driver_name="ascii_stream", replay_file=None, replay_speed=1.0, record_file=None, **driver_options):
+    global ser, scale_driver, uart_setup_options
+    uart_setup_options = dict(driver_name=driver_name, replay_file=replay_file, replay_speed=replay_speed,
+                              record_file=record_file, **driver_options)
+    scale_driver = scale_drivers.get_scale_driver(driver_name, **driver_options)
     try:
-        ser = serial.Serial('/dev/ttyS0', baudrate=9600, timeout=2)
+        if replay_file:
+            ser = serial_replay.ReplaySerial(replay_file, speed=replay_speed, timeout=SERIAL_TIMEOUT, loop=True)
+        else:
+            ser = serial.Serial(SERIAL_PORT, baudrate=BAUDRATE, timeout=SERIAL_TIMEOUT)
+            if record_file:
+                ser = serial_replay.RecordingSerial(ser, record_file)
         if ser.is_open:
-            print("UART connected to weighing scale.")
+            print(f"UART connected to weighing scale ({scale_driver.name}).")
     except Exception as e:
         print(f"Error connecting to UART: {e}")
 
 # Function to read weight from the UART-connected weighing scale
 def read_weight_from_uart():
-    global ser, weight,SerialFailCount  # Declare weight as global so it can be accessed and modified
-    buffer = ""
-    ignore_bytes = 20  # Number of bytes to ignore at the beginning
+    global ser, weight, SerialFailCount  # Declare weight as global so it can be accessed and modified
 
     while True:
         pause_event.wait()  # Wait here if operations are paused
+        if ser is None:
+            # Not connected at startup, or unplugged: try again every UART_RETRY_INTERVAL
+            weight = "Non"
+            setup_uart(**uart_setup_options)
+            if ser is None:
+                time.sleep(UART_RETRY_INTERVAL)
+                continue
         try:
-            # Read raw data from UART in chunks (100 bytes)
-            
-            chunk = ser.read(100).decode('utf-8', errors='ignore')  # Ignore decoding errors for incomplete chunks
-            if chunk:
-                buffer = chunk  # Append new data to the buffer
-                # Ignore the first 20 bytes only once
-                if len(buffer) > ignore_bytes:
-                    buffer = buffer[ignore_bytes:]
-                    ignore_bytes = 0  # Reset, as we've ignored the first 20 bytes
-                    #print(f"Buffer After Ignoring First 20 Bytes: {buffer}")
-
-                # Regular expression to match the first valid weight format (number + unit)
-                # and extract until the next occurrence of a unit.
-                match = re.search(r'([ \t]*\d+\.\d+[a-zA-Z]+)[^a-zA-Z]*', buffer)
-                
-                if match:
-                    SerialFailCount = 0
-                    # Extract the matched weight
-                    weight = match.group(1).strip()
-                    #print(f"Extracted Weight: {weight}")
-
-                    # Remove the processed part from the buffer
-                    buffer = buffer[match.end():].strip()
-                    #print(f"Updated Buffer After Extraction: {buffer}")
-                else:
-                    SerialFailCount += 1
+            # Read everything the scale sent since the last poll so the
+            # displayed weight is the latest one, not a reading from the backlog
+            with stage_timing.timed("uart.read"):
+                chunk = scale_driver.read(ser)
+            with stage_timing.timed("uart.parse"):
+                readings = scale_driver.feed(chunk) if chunk else []
+            if readings:
+                SerialFailCount = 0
+                weight = readings[-1]
+                stage_timing.count("uart.readings", len(readings))
             else:
                 SerialFailCount += 1
+                stage_timing.count("uart.empty_polls")
             if SerialFailCount > 10:
-                weight = "Non" 
-                SerialFailCount = 0 
+                weight = "Non"
+                SerialFailCount = 0
         except Exception as e:
+            stage_timing.count("uart.errors")
             print(f"Error reading from UART: {e}")
+            if isinstance(e, serial.SerialException):
+                ser.close()
+                ser = None  # Reopen the port on the next poll
 
         time.sleep(1)  # Poll every second
@@ -0,0 +1,99 @@
+#view_model.py
+# What the monitoring screen shows, kept apart from the Tk widgets. The display
+# loop builds the text for each panel and hands it to a WidgetView, which
+# remembers what every widget currently shows and only calls widget.config()
+# for options that actually changed, so an unchanged clock or weight does not
+# make Tk lay out the label again on every tick.
+import stage_timing  # Hot-path timing histograms
+
+# Function to build the text of the time, date and weight panel
+def format_meal_text(rtc_time, weight):
+    return f"\tMidday Meal\n\nTime: {rtc_time['time']}\n\nDate: {rtc_time['date']}\n\nFood Weight: {weight}"
+
+# Function to build the message shown in place of a camera that is not available
+def format_camera_unavailable(number, state):
+    return f"Camera {number} not available ({state})"
+
+# Last rendered options of each widget
+class WidgetView:
+    def __init__(self):
+        self.rendered = {}  # widget -> {option: value}
+
+    # Function to set widget options, touching the widget only if something changed.
+    # Returns True if the widget was updated.
+    def apply(self, widget, **options):
+        rendered = self.rendered.setdefault(widget, {})
+        changed = {name: value for name, value in options.items()
+                   if name not in rendered or rendered[name] != value}
+        if not changed:
+            stage_timing.count("view.unchanged")
+            return False
+        widget.config(**changed)
+        rendered.update(changed)
+        return True
+
+    # Function to drop what is remembered for destroyed widgets
+    def forget(self, widget=None):
+        if widget is None:
+            self.rendered.clear()
+        else:
+            self.rendered.pop(widget, None)
+
+# Function to build the weight panel text of the one-screen layout
+def format_weight_text(rtc_time, weight):
+    return f"Weight: {weight}"
+
+# Function to build the clock panel text of the one-screen layout
+def format_clock_text(rtc_time, weight):
+    return f"Midday Meal\nTime: {rtc_time['time']}\nDate: {rtc_time['date']}"
+
+# Tk label options of the panel styles
+CAMERA_PANEL = {"bd": 5, "relief": "raised"}
+TEXT_PANEL = {"font": ("Helvetica", 20), "bg": "white", "fg": "black", "bd": 5, "relief": "ridge",
+              "padx": 10, "pady": 10, "anchor": "w", "justify": "left"}
+NOTES_PANEL = dict(TEXT_PANEL, font=("Helvetica", 18), relief="groove", text="Notes Frame")
+SOLID_CAMERA_PANEL = {"bd": 5, "relief": "solid"}
+LARGE_TEXT_PANEL = {"font": ("Helvetica", 24), "bg": "white", "fg": "black", "bd": 5, "relief": "solid",
+                    "padx": 10, "pady": 10}
+
+# Monitoring screen layouts, selected with display.layout in the config file.
+# panels: (name, grid position, label options) in creation order; "face" and
+#         "plate" show the cameras, the others show text
+# texts:  panel name -> function(rtc_time, weight) building its text
+# stats_panel: panel that shows the timing stats (F9)
+LAYOUT_PROFILES = {
+    # Large face camera on the left above the plate camera; time, date and
+    # weight on the right above a notes panel
+    "two_screen": {
+        "panels": [
+            ("face", {"row": 0, "column": 0, "rowspan": 3}, CAMERA_PANEL),
+            ("plate", {"row": 3, "column": 0, "rowspan": 2}, CAMERA_PANEL),
+            ("meal", {"row": 0, "column": 1, "rowspan": 3}, TEXT_PANEL),
+            ("notes", {"row": 3, "column": 1, "rowspan": 2}, NOTES_PANEL),
+        ],
+        "texts": {"meal": format_meal_text},
+        "stats_panel": "notes",
+        "row_weights": [3, 3, 3, 2, 1],
+        "column_weights": [3, 2],
+    },
+    # 2x2 grid: weight and clock on the left, the two cameras on the right
+    "one_screen": {
+        "panels": [
+            ("weight", {"row": 0, "column": 0}, LARGE_TEXT_PANEL),
+            ("face", {"row": 0, "column": 1}, SOLID_CAMERA_PANEL),
+            ("meal", {"row": 1, "column": 0}, LARGE_TEXT_PANEL),
+            ("plate", {"row": 1, "column": 1}, SOLID_CAMERA_PANEL),
+        ],
+        "texts": {"weight": format_weight_text, "meal": format_clock_text},
+        "stats_panel": "meal",
+        "row_weights": [1, 1],
+        "column_weights": [1, 1],
+    },
+}
+
+# Function to get a layout profile by name
+def get_layout(name):
+    try:
+        return LAYOUT_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown layout '{name}'. Available: {', '.join(LAYOUT_PROFILES)}")